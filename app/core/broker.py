@@ -0,0 +1,64 @@
+import asyncio
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Any, AsyncIterator
+
+from app.core.config import get_settings
+
+
+class SubscriberOverflowError(Exception):
+    pass
+
+
+class _Subscriber:
+    __slots__ = ('messages', 'ready', 'overflowed')
+
+    def __init__(self):
+        self.messages: deque = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+
+class Broker:
+    """
+    In-process pub/sub: every message published to a topic is delivered to each current subscriber of the topic.
+    Publishing never waits, a subscriber that falls `queue_size` messages behind is ended with
+    SubscriberOverflowError rather than slowing down the writers. Only writes of this process are seen.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: defaultdict[str, set[_Subscriber]] = defaultdict(set)
+
+    def publish(self, topic: str, message: Any) -> None:
+        for subscriber in self._subscribers.get(topic, ()):
+            if len(subscriber.messages) >= self.queue_size:
+                subscriber.overflowed = True
+            else:
+                subscriber.messages.append(message)
+            subscriber.ready.set()
+
+    async def subscribe(self, topic: str) -> AsyncIterator[Any]:
+        """Messages published to `topic` from the first iteration on, until the iterator is closed"""
+        subscriber = _Subscriber()
+        self._subscribers[topic].add(subscriber)
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.messages and not subscriber.overflowed:
+                    yield subscriber.messages.popleft()
+                if subscriber.overflowed:
+                    raise SubscriberOverflowError(f'Subscriber of {topic} fell {self.queue_size} messages behind')
+        finally:
+            self._subscribers[topic].discard(subscriber)
+            if not self._subscribers[topic]:
+                del self._subscribers[topic]
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscribers.get(topic, ()))
+
+
+@lru_cache
+def get_broker() -> Broker:
+    return Broker(queue_size=get_settings().SUBSCRIPTION_QUEUE_SIZE)
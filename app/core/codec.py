@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import importlib.util
+import json
+from typing import Any, Callable, Literal
+
+CodecName = Literal['auto', 'orjson', 'msgspec', 'stdlib']
+
+
+@dataclass(frozen=True, slots=True)
+class JsonCodec:
+    """
+    JSON encoder/decoder pair. `dumps` returns UTF-8 bytes, `loads` accepts str or bytes and raises ValueError
+    on invalid input. Both are module-level functions, so they can be sent to a process pool.
+    """
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[str | bytes], Any]
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value).encode()
+
+
+def _msgspec_loads(content: str | bytes) -> Any:
+    import msgspec
+
+    try:
+        return msgspec.json.decode(content)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from None
+
+
+@lru_cache
+def get_codec(name: CodecName = 'auto') -> JsonCodec:
+    """Returns the named codec, 'auto' picks the fastest installed one: orjson, msgspec, then the stdlib"""
+    if name == 'auto':
+        name = next((n for n in ('orjson', 'msgspec') if importlib.util.find_spec(n) is not None), 'stdlib')
+
+    if name == 'orjson':
+        import orjson
+
+        return JsonCodec(name, orjson.dumps, orjson.loads)
+    if name == 'msgspec':
+        import msgspec
+
+        return JsonCodec(name, msgspec.json.encode, _msgspec_loads)
+    return JsonCodec(name, _stdlib_dumps, json.loads)
+
+
+STDLIB_CODEC = get_codec('stdlib')
@@ -1,10 +1,39 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_PATH: str = 'app/db'
+    DATABASE_ENGINE: Literal['json', 'wal', 'sqlite'] = 'json'  # 'sqlite' keeps every table in <table>.sqlite3
+    WAL_COMPACT_THRESHOLD: int = 1000
+    DATABASE_FILE_LOCK: bool = False
+    JSON_CODEC: Literal['auto', 'orjson', 'msgspec', 'stdlib'] = 'auto'  # 'auto' picks the fastest installed one
+    JSON_EXECUTOR: Literal['none', 'thread', 'process'] = 'thread'
+    JSON_EXECUTOR_WORKERS: int | None = None
+    JSON_OFFLOAD_MIN_SIZE: int = 1 << 20  # bytes of table JSON, smaller tables are encoded/decoded on the event loop
+
+    QUERY_MAX_COST: int = 50_000
+    QUERY_DEFAULT_LIST_SIZE: int = 100
+
+    PERSISTED_QUERIES_MAXSIZE: int = 1024
+    PERSISTED_QUERIES_PATH: str | None = None  # JSON list of allowed documents, enables allow-list mode
+
+    RESPONSE_CACHE_MAXSIZE: int = 1024  # 0 disables the cache
+    RESPONSE_CACHE_TTL: float = 60
+
+    METRICS_ENABLED: bool = True  # GraphQL operation and resolver timings on /metrics, storage metrics are always on
+
+    # Committed changes per table kept for `changes`, older versions need a full resync. The log lives in the
+    # worker's memory, so `changes` needs a single worker: writes by others (DATABASE_FILE_LOCK) expire it
+    CHANGE_LOG_SIZE: int = 10_000
+    SUBSCRIPTION_QUEUE_SIZE: int = 1000  # Events buffered per subscriber, one falling further behind is disconnected
+
+    PROFILING_ENABLED: bool = False  # Requests with PROFILING_HEADER get a cProfile breakdown in `extensions.profile`
+    PROFILING_HEADER: str = 'X-Profile'
+    PROFILING_TOKEN: str | None = None  # Required header value when set
+    PROFILING_DIR: str | None = None  # Also writes every profile there as <time>-<operation>.prof
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,124 @@
+import bisect
+import math
+from typing import Callable, Iterator, Literal
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Counter:
+    """Monotonic total per combination of label values"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        REGISTRY.register(self)
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values per combination of label values"""
+
+    type = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label values: a count per bucket plus one for +Inf, then the sum of observed values
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        REGISTRY.register(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._values.get(labels)
+        if counts is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, counts in self._values.items():
+            label_dict = dict(zip(self.labelnames, labels))
+            total = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                total += count
+                yield f'{self.name}_bucket', {**label_dict, 'le': _format_value(bound)}, total
+            yield f'{self.name}_sum', label_dict, counts[-1]
+            yield f'{self.name}_count', label_dict, total
+
+
+class CallbackMetric:
+    """Values read from `collect` on every scrape, for state that is already counted elsewhere"""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            type: Literal['counter', 'gauge'],
+            labelnames: tuple[str, ...],
+            collect: Callable[[], dict[tuple[str, ...], float]],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.labelnames = labelnames
+        self.collect = collect
+        REGISTRY.register(self)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for labels, value in self.collect().items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+Metric = Counter | Histogram | CallbackMetric
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                if label_text:
+                    name = f'{name}{{{label_text}}}'
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    return '+Inf' if value == math.inf else repr(float(value))
+
+
+REGISTRY = Registry()
@@ -6,5 +6,17 @@ class NotFoundError(BaseServiceError):
     pass
 
 
+class ReferenceNotFoundError(NotFoundError):
+    """A row the written row points to, e.g. the author of a book, does not exist"""
+
+
 class AlreadyExistError(BaseServiceError):
     pass
+
+
+class ReferencedError(BaseServiceError):
+    pass
+
+
+class VersionExpiredError(BaseServiceError):
+    """The change log no longer reaches back to the requested version, the client has to resync in full"""
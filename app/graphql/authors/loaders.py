@@ -0,0 +1,15 @@
+from strawberry.dataloader import DataLoader
+
+from app.core.config import Settings
+from app.exceptions import NotFoundError
+from app.graphql.authors.service import AuthorService
+from app.graphql.authors.types import AuthorType
+
+
+def create_author_loader(settings: Settings) -> DataLoader[int, AuthorType]:
+    async def load_authors(author_ids: list[int]) -> list[AuthorType | NotFoundError]:
+        service = AuthorService(settings=settings)
+        authors = await service.get_authors_by_ids(author_ids)
+        return [authors.get(i) or NotFoundError(f'Author(id={i}) Not Found') for i in author_ids]
+
+    return DataLoader(load_fn=load_authors)
@@ -1,16 +1,23 @@
+from typing import AsyncGenerator
+
 import strawberry
 from strawberry.types import Info
 
-from app.exceptions import AlreadyExistError, NotFoundError
+from app.core.broker import get_broker
+from app.exceptions import AlreadyExistError, NotFoundError, ReferencedError
 from app.graphql.authors.responses import (
     AuthorAddResponse,
     AuthorAlreadyExistResponse,
+    AuthorDeleteResponse,
     AuthorGetResponse,
+    AuthorHasBooksResponse,
     AuthorNotFoundResponse,
+    AuthorUpdateResponse,
 )
 from app.graphql.authors.schemas import AuthorCreate
-from app.graphql.authors.service import AuthorService
-from app.graphql.authors.types import AuthorAddInput, AuthorType
+from app.graphql.authors.service import AUTHOR_CREATED, AUTHOR_DELETED, AUTHOR_UPDATED, AuthorService
+from app.graphql.authors.types import AuthorAddInput, AuthorDeleteMode, AuthorType, AuthorUpdateInput
+from app.graphql.pagination import Connection, create_connection, decode_cursor, DEFAULT_PAGE_SIZE, validate_first
 from app.graphql.validation import PydanticValidationExtension
 
 
@@ -21,6 +28,19 @@ class AuthorsQuery:
         service = AuthorService(settings=info.context['settings'])
         return await service.get_authors()
 
+    @strawberry.field
+    async def authors_connection(
+            self, info: Info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> Connection[AuthorType]:
+        service = AuthorService(settings=info.context['settings'])
+        authors, has_next_page = await service.get_authors_page(validate_first(first), after=decode_cursor(after))
+        return create_connection(authors, has_next_page)
+
+    @strawberry.field
+    async def search_authors(self, query: str, info: Info, first: int = DEFAULT_PAGE_SIZE) -> list[AuthorType]:
+        service = AuthorService(settings=info.context['settings'])
+        return await service.search_authors(query, validate_first(first))
+
     @strawberry.field
     async def author(self, author_id: int, info: Info) -> AuthorGetResponse:
         service = AuthorService(settings=info.context['settings'])
@@ -42,11 +62,51 @@ class AuthorsMutation:
             return AuthorAlreadyExistResponse(message=str(e))
         return author
 
+    @strawberry.mutation(extensions=[PydanticValidationExtension(AuthorCreate)])
+    async def create_authors(self, input_schema: list[AuthorAddInput], info: Info) -> list[AuthorAddResponse]:
+        service = AuthorService(settings=info.context['settings'])
+        authors = await service.create_authors(names=[i.name for i in input_schema])
+        return [AuthorAlreadyExistResponse(message=str(a)) if isinstance(a, AlreadyExistError) else a for a in authors]
+
+    @strawberry.mutation(extensions=[PydanticValidationExtension(AuthorCreate)])
+    async def update_author(self, author_id: int, input_schema: AuthorUpdateInput, info: Info) -> AuthorUpdateResponse:
+        service = AuthorService(settings=info.context['settings'])
+        try:
+            author = await service.update_author(author_id, name=input_schema.name)
+        except NotFoundError as e:
+            return AuthorNotFoundResponse(message=str(e))
+        except AlreadyExistError as e:
+            return AuthorAlreadyExistResponse(message=str(e))
+        return author
+
     @strawberry.mutation
-    async def delete_author(self, author_id: int, info: Info) -> None | AuthorNotFoundResponse:
+    async def delete_author(
+            self, author_id: int, info: Info, on_delete: AuthorDeleteMode = AuthorDeleteMode.RESTRICT
+    ) -> AuthorDeleteResponse | None:
         service = AuthorService(settings=info.context['settings'])
         try:
-            await service.delete_author(author_id)
+            await service.delete_author(author_id, cascade=on_delete == AuthorDeleteMode.CASCADE)
         except NotFoundError as e:
             return AuthorNotFoundResponse(message=str(e))
+        except ReferencedError as e:
+            return AuthorHasBooksResponse(message=str(e))
         return None
+
+
+@strawberry.type
+class AuthorsSubscription:
+    @strawberry.subscription
+    async def author_created(self) -> AsyncGenerator[AuthorType, None]:
+        async for author in get_broker().subscribe(AUTHOR_CREATED):
+            yield author
+
+    @strawberry.subscription
+    async def author_updated(self) -> AsyncGenerator[AuthorType, None]:
+        async for author in get_broker().subscribe(AUTHOR_UPDATED):
+            yield author
+
+    @strawberry.subscription
+    async def author_deleted(self) -> AsyncGenerator[int, None]:
+        # Deleted authors are sent as ids, a cascade also sends book_deleted for each of their books first
+        async for author_id in get_broker().subscribe(AUTHOR_DELETED):
+            yield author_id
@@ -14,6 +14,11 @@ class AuthorAlreadyExistResponse:
     message: str = 'Author already exist'
 
 
+@strawberry.type(name='AuthorHasBooks')
+class AuthorHasBooksResponse:
+    message: str = 'Author still has books'
+
+
 AuthorGetResponse = strawberry.union('AuthorGetResponse', (AuthorType, AuthorNotFoundResponse))
 AuthorAddResponse = strawberry.union(
     'AuthorAddResponse', (AuthorType, ValidationErrorResponse, AuthorAlreadyExistResponse)
@@ -21,3 +26,4 @@ AuthorAddResponse = strawberry.union(
 AuthorUpdateResponse = strawberry.union(
     'AuthorUpdateResponse', (AuthorType, ValidationErrorResponse, AuthorNotFoundResponse, AuthorAlreadyExistResponse)
 )
+AuthorDeleteResponse = strawberry.union('AuthorDeleteResponse', (AuthorNotFoundResponse, AuthorHasBooksResponse))
@@ -1,76 +1,149 @@
-import json
-import os
 from typing import Any
 
-from aiofiles import open
-
+from app.core.broker import get_broker
 from app.core.config import Settings
-from app.exceptions import AlreadyExistError, NotFoundError
+from app.exceptions import AlreadyExistError, NotFoundError, VersionExpiredError
 from app.graphql.authors.types import AuthorType
 from app.graphql.converters import strawberry_to_dict
+from app.graphql.search import tokenize
+from app.storage.backends import Change
+from app.storage.table import get_table, Index
 
+# Broker topics published after every committed write: the author for created/updated, the id for deleted
+AUTHOR_CREATED, AUTHOR_UPDATED, AUTHOR_DELETED = 'author_created', 'author_updated', 'author_deleted'
 
-def _load_author_type(author: dict[str, Any]) -> AuthorType:
-    return AuthorType(id=author['id'], name=author['name'])
-
+_AUTHOR_COLUMNS = {'name': str}
+_AUTHOR_INDEXES = {
+    'name': Index(key=lambda a: a['name'].lower(), unique=True, sql='lower(name)'),
+    'name_tokens': Index(key=lambda a: tokenize(a['name']), tokens=True),
+}
 
-def _extract_author(author_id: int, authors: list[AuthorType]) -> AuthorType:
-    authors = {a.id: a for a in authors}
-    if author_id not in authors:
-        raise NotFoundError(f'Author(id={author_id}) Not Found')
 
-    return authors[author_id]
+def _load_author_type(author: dict[str, Any]) -> AuthorType:
+    return AuthorType(id=author['id'], name=author['name'])
 
 
 class AuthorService:
     __filename = 'authors.json'
 
     def __init__(self, settings: Settings):
-        self.__file_path = os.path.join(settings.DATABASE_PATH, AuthorService.__filename)
+        self.__settings = settings
+        self.__table = get_table(settings, AuthorService.__filename, indexes=_AUTHOR_INDEXES, columns=_AUTHOR_COLUMNS)
 
     async def get_authors(self) -> list[AuthorType]:
-        async with open(self.__file_path, 'r') as file:
-            content = await file.read()
-            authors = json.loads(content) if content else []
-
-        authors = [_load_author_type(a) for a in authors]
-        return authors
+        await self.__table.refresh()
+        return [_load_author_type(a) for a in self.__table.all()]
 
     async def get_author_by_id(self, author_id: int) -> AuthorType:
-        author = _extract_author(author_id, authors=await self.get_authors())
-        return author
+        authors = await self.__table.find(None, author_id, limit=1)
+        if not authors:
+            raise NotFoundError(f'Author(id={author_id}) Not Found')
+
+        return _load_author_type(authors[0])
+
+    async def get_authors_page(self, first: int, after: int | None = None) -> tuple[list[tuple[int, AuthorType]], bool]:
+        """Returns authors in id order paired with their pagination positions"""
+        await self.__table.refresh()
+        authors, has_next_page = self.__table.page(first, after)
+        return [(a['id'], _load_author_type(a)) for a in authors], has_next_page
+
+    async def search_authors(self, query: str, first: int | None = None) -> list[AuthorType]:
+        """Authors whose name holds every word of `query`, the last word may be incomplete"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        await self.__table.refresh()
+        return [_load_author_type(a) for a in self.__table.search('name_tokens', terms, first)]
+
+    async def get_changes(self, since: tuple[str, int] | None) -> tuple[list[AuthorType], list[int], tuple[str, int]]:
+        """
+        Authors created or updated and ids of authors deleted after the `since` version, with the current version.
+        Without `since` every author is returned. VersionExpiredError means `since` is no longer in the change log.
+        """
+        await self.__table.refresh()
+        version = (self.__table.log_id, self.__table.generation)
+        if since is None:
+            return [_load_author_type(a) for a in self.__table.all()], [], version
+
+        changes = self.__table.changes_since(*since)
+        if changes is None:
+            raise VersionExpiredError('Authors version expired')
+        authors, deleted_ids = changes
+        return [_load_author_type(a) for a in authors], deleted_ids, version
+
+    async def get_authors_by_ids(self, author_ids: list[int]) -> dict[int, AuthorType]:
+        await self.__table.refresh()
+        authors = {i: self.__table.get(i) for i in author_ids}
+        return {i: _load_author_type(a) for i, a in authors.items() if a is not None}
 
     async def create_author(self, name: str) -> AuthorType:
-        await self._validate_author(name)
-        authors = await self.get_authors()
-
-        new_author = AuthorType(id=await self._get_next_id(), name=name)
-        authors.append(new_author)
+        async with self.__table.transaction():
+            self._validate_author(name)
 
-        authors_data = [strawberry_to_dict(a, exclude={'books'}) for a in authors]
-        async with open(self.__file_path, 'w') as file:
-            await file.write(json.dumps(authors_data))
+            new_author = AuthorType(id=self.__table.next_id(), name=name)
+            await self.__table.insert(strawberry_to_dict(new_author, exclude={'books'}))
 
+        get_broker().publish(AUTHOR_CREATED, new_author)
         return new_author
 
-    async def _validate_author(self, name: str) -> None:
-        authors = await self.get_authors()
-        for a in authors:
-            if a.name.lower() == name.lower():
-                raise AlreadyExistError('Author with this name already exist')
+    async def create_authors(self, names: list[str]) -> list[AuthorType | AlreadyExistError]:
+        """Creates every author with a unique name in one commit, failed items are returned as errors"""
+        results, changes, batch_names = [], [], set()
+        async with self.__table.transaction():
+            for name in names:
+                try:
+                    self._validate_author(name)
+                    if name.lower() in batch_names:
+                        raise AlreadyExistError('Author with this name already exist')
+                except AlreadyExistError as e:
+                    results.append(e)
+                    continue
+
+                new_author = AuthorType(id=self.__table.next_id() + len(changes), name=name)
+                changes.append(Change('insert', strawberry_to_dict(new_author, exclude={'books'})))
+                batch_names.add(name.lower())
+                results.append(new_author)
+
+            if changes:
+                await self.__table.commit(changes)
+
+        broker = get_broker()
+        for author in results:
+            if isinstance(author, AuthorType):
+                broker.publish(AUTHOR_CREATED, author)
+        return results
+
+    async def update_author(self, author_id: int, name: str) -> AuthorType:
+        async with self.__table.transaction():
+            if self.__table.get(author_id) is None:
+                raise NotFoundError(f'Author(id={author_id}) Not Found')
+            self._validate_author(name, author_id=author_id)
+
+            author = AuthorType(id=author_id, name=name)
+            await self.__table.update(strawberry_to_dict(author, exclude={'books'}))
+
+        get_broker().publish(AUTHOR_UPDATED, author)
+        return author
 
-    async def _get_next_id(self) -> int:
-        authors = await self.get_authors()
-        if not authors:
-            return 1
+    def _validate_author(self, name: str, *, author_id: int | None = None) -> None:
+        """Names are unique regardless of case, `author_id` is the author being renamed"""
+        author = self.__table.lookup('name', name.lower())
+        if author is not None and author['id'] != author_id:
+            raise AlreadyExistError('Author with this name already exist')
+
+    async def delete_author(self, author_id: int, *, cascade: bool = False) -> None:
+        """
+        Deletes the author together with their books when `cascade` is set, otherwise an author who still has books
+        is kept and ReferencedError is raised. Either way no book is left pointing to a deleted author.
+        """
+        from app.graphql.books.service import BookService
 
-        last_id = max(a.id for a in authors)
-        return last_id + 1
+        async with self.__table.transaction():
+            if self.__table.get(author_id) is None:
+                raise NotFoundError(f'Author(id={author_id}) Not Found')
 
-    async def delete_author(self, author_id: int) -> None:
-        authors = await self.get_authors()
-        author = _extract_author(author_id, authors)
+            async with BookService(self.__settings).deleting_author_books(author_id, cascade=cascade):
+                await self.__table.delete(author_id)
 
-        updated_authors = [strawberry_to_dict(a, exclude={'books'}) for a in authors if a.id != author.id]
-        async with open(self.__file_path, 'w') as f:
-            await f.write(json.dumps(updated_authors))
+        get_broker().publish(AUTHOR_DELETED, author_id)
@@ -1,8 +1,11 @@
+from enum import Enum
 from typing import Annotated, TYPE_CHECKING
 
 import strawberry
 from strawberry.types import Info
 
+from app.graphql.pagination import validate_first
+
 if TYPE_CHECKING:
     from app.graphql.books.types import BookType
 
@@ -17,14 +20,24 @@ class AuthorUpdateInput(AuthorAddInput):
     pass
 
 
+@strawberry.enum(name='AuthorDeleteMode')
+class AuthorDeleteMode(Enum):
+    RESTRICT = 'restrict'  # keep an author who still has books
+    CASCADE = 'cascade'  # delete the author's books as well
+
+
 @strawberry.type(name='Author')
 class AuthorType:
     id: int
     name: str
 
     @strawberry.field
-    async def books(self, info: Info) -> list[Annotated['BookType', strawberry.lazy('app.graphql.books.types')]]:
-        from app.graphql.books.service import BookService
-
-        service = BookService(settings=info.context['settings'])
-        return await service.get_books_by_author_id(self.id)
+    async def books(
+            self, info: Info, first: int | None = None, name_prefix: str = ''
+    ) -> list[Annotated['BookType', strawberry.lazy('app.graphql.books.types')]]:
+        if first is None and not name_prefix:
+            return await info.context['books_by_author_loader'].load(self.id)
+
+        return await info.context['books_page_by_author_loader'].load(
+            (self.id, first if first is None else validate_first(first), name_prefix)
+        )
@@ -0,0 +1,23 @@
+from strawberry.dataloader import DataLoader
+
+from app.core.config import Settings
+from app.graphql.books.service import BookService
+from app.graphql.books.types import BookType
+
+
+def create_books_by_author_loader(settings: Settings) -> DataLoader[int, list[BookType]]:
+    async def load_books(author_ids: list[int]) -> list[list[BookType]]:
+        service = BookService(settings=settings)
+        books = await service.get_books_by_author_ids(author_ids)
+        return [books[i] for i in author_ids]
+
+    return DataLoader(load_fn=load_books)
+
+
+def create_books_page_by_author_loader(settings: Settings) -> DataLoader[tuple[int, int | None, str], list[BookType]]:
+    """Keyed by (author_id, first, name_prefix), so the filtered books of every author in a listing load together"""
+    async def load_pages(pages: list[tuple[int, int | None, str]]) -> list[list[BookType]]:
+        service = BookService(settings=settings)
+        return await service.get_author_books_pages(pages)
+
+    return DataLoader(load_fn=load_pages)
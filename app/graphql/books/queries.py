@@ -1,15 +1,33 @@
+from typing import AsyncGenerator
+
 import strawberry
 from strawberry.types import Info
 
-from app.exceptions import AlreadyExistError, NotFoundError
+from app.core.broker import get_broker
+from app.exceptions import AlreadyExistError, NotFoundError, ReferenceNotFoundError
 from app.graphql.authors.responses import AuthorNotFoundResponse
-from app.graphql.books.responses import BookAddResponse, BookAlreadyExistResponse, BookGetResponse, BookNotFoundResponse
+from app.graphql.books.responses import (
+    BookAddResponse,
+    BookAlreadyExistResponse,
+    BookGetResponse,
+    BookNotFoundResponse,
+    BookUpdateResponse,
+)
 from app.graphql.books.schemas import BookCreate
-from app.graphql.books.service import BookService
-from app.graphql.books.types import BookAddInput, BookType
+from app.graphql.books.service import BOOK_CREATED, BOOK_DELETED, BOOK_UPDATED, BookService
+from app.graphql.books.types import BookAddInput, BookType, BookUpdateInput
+from app.graphql.pagination import Connection, create_connection, decode_cursor, DEFAULT_PAGE_SIZE, validate_first
 from app.graphql.validation import PydanticValidationExtension
 
 
+def _to_add_response(book: BookType | NotFoundError | AlreadyExistError) -> BookAddResponse:
+    if isinstance(book, NotFoundError):
+        return AuthorNotFoundResponse(message=str(book))
+    if isinstance(book, AlreadyExistError):
+        return BookAlreadyExistResponse(message=str(book))
+    return book
+
+
 @strawberry.type
 class BooksQuery:
     @strawberry.field
@@ -17,6 +35,29 @@ class BooksQuery:
         service = BookService(settings=info.context['settings'])
         return await service.get_books()
 
+    @strawberry.field
+    async def books_connection(
+            self,
+            info: Info,
+            first: int = DEFAULT_PAGE_SIZE,
+            after: str | None = None,
+            author_id: int | None = None,
+            name_prefix: str = '',
+    ) -> Connection[BookType]:
+        service = BookService(settings=info.context['settings'])
+        books, has_next_page = await service.get_books_page(
+            validate_first(first),
+            after=decode_cursor(after, by_name=bool(name_prefix)),
+            author_id=author_id,
+            name_prefix=name_prefix,
+        )
+        return create_connection(books, has_next_page)
+
+    @strawberry.field
+    async def search_books(self, query: str, info: Info, first: int = DEFAULT_PAGE_SIZE) -> list[BookType]:
+        service = BookService(settings=info.context['settings'])
+        return await service.search_books(query, validate_first(first))
+
     @strawberry.field
     async def book(self, book_id: int, info: Info) -> BookGetResponse:
         service = BookService(settings=info.context['settings'])
@@ -40,6 +81,25 @@ class BooksMutation:
             return BookAlreadyExistResponse(message=str(e))
         return book
 
+    @strawberry.mutation(extensions=[PydanticValidationExtension(BookCreate)])
+    async def create_books(self, input_schema: list[BookAddInput], info: Info) -> list[BookAddResponse]:
+        service = BookService(settings=info.context['settings'])
+        books = await service.create_books(books=[(i.author_id, i.name) for i in input_schema])
+        return [_to_add_response(b) for b in books]
+
+    @strawberry.mutation(extensions=[PydanticValidationExtension(BookCreate)])
+    async def update_book(self, book_id: int, input_schema: BookUpdateInput, info: Info) -> BookUpdateResponse:
+        service = BookService(settings=info.context['settings'])
+        try:
+            book = await service.update_book(book_id, author_id=input_schema.author_id, name=input_schema.name)
+        except ReferenceNotFoundError as e:
+            return AuthorNotFoundResponse(message=str(e))
+        except NotFoundError as e:
+            return BookNotFoundResponse(message=str(e))
+        except AlreadyExistError as e:
+            return BookAlreadyExistResponse(message=str(e))
+        return book
+
     @strawberry.mutation
     async def delete_book(self, book_id: int, info: Info) -> None | BookNotFoundResponse:
         service = BookService(settings=info.context['settings'])
@@ -48,3 +108,28 @@ class BooksMutation:
         except NotFoundError as e:
             return BookNotFoundResponse(message=str(e))
         return None
+
+    @strawberry.mutation
+    async def delete_books(self, book_ids: list[int], info: Info) -> list[BookNotFoundResponse | None]:
+        service = BookService(settings=info.context['settings'])
+        results = await service.delete_books(book_ids)
+        return [BookNotFoundResponse(message=str(e)) if e is not None else None for e in results]
+
+
+@strawberry.type
+class BooksSubscription:
+    @strawberry.subscription
+    async def book_created(self) -> AsyncGenerator[BookType, None]:
+        async for book in get_broker().subscribe(BOOK_CREATED):
+            yield book
+
+    @strawberry.subscription
+    async def book_updated(self) -> AsyncGenerator[BookType, None]:
+        async for book in get_broker().subscribe(BOOK_UPDATED):
+            yield book
+
+    @strawberry.subscription
+    async def book_deleted(self) -> AsyncGenerator[int, None]:
+        # Deleted books are sent as ids
+        async for book_id in get_broker().subscribe(BOOK_DELETED):
+            yield book_id
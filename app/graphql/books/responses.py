@@ -1,5 +1,6 @@
 import strawberry
 
+from app.graphql.authors.responses import AuthorNotFoundResponse
 from app.graphql.books.types import BookType
 from app.graphql.validation import ValidationErrorResponse
 
@@ -16,8 +17,9 @@ class BookAlreadyExistResponse:
 
 BookGetResponse = strawberry.union('BookGetResponse', (BookType, BookNotFoundResponse))
 BookAddResponse = strawberry.union(
-    'BookAddResponse', (BookType, ValidationErrorResponse, BookAlreadyExistResponse)
+    'BookAddResponse', (BookType, ValidationErrorResponse, BookAlreadyExistResponse, AuthorNotFoundResponse)
 )
 BookUpdateResponse = strawberry.union(
-    'BookUpdateResponse', (BookType, ValidationErrorResponse, BookNotFoundResponse, BookAlreadyExistResponse)
+    'BookUpdateResponse',
+    (BookType, ValidationErrorResponse, BookNotFoundResponse, BookAlreadyExistResponse, AuthorNotFoundResponse),
 )
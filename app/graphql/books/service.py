@@ -1,84 +1,262 @@
-import json
-import os
-from typing import Any
-
-from aiofiles import open
+from contextlib import asynccontextmanager
+import sys
+from typing import Any, AsyncIterator
 
+from app.core.broker import get_broker
 from app.core.config import Settings
-from app.exceptions import AlreadyExistError, NotFoundError
+from app.exceptions import (
+    AlreadyExistError,
+    NotFoundError,
+    ReferencedError,
+    ReferenceNotFoundError,
+    VersionExpiredError,
+)
 from app.graphql.authors.service import AuthorService
 from app.graphql.books.types import BookType
 from app.graphql.converters import strawberry_to_dict
+from app.graphql.pagination import Position
+from app.graphql.search import tokenize
+from app.storage.backends import Change
+from app.storage.table import get_table, Index
 
+# Broker topics published after every committed write: the book for created/updated, the id for deleted
+BOOK_CREATED, BOOK_UPDATED, BOOK_DELETED = 'book_created', 'book_updated', 'book_deleted'
 
-def _load_book_type(book: dict[str, Any]) -> BookType:
-    return BookType(id=book['id'], author_id=book['author_id'], name=book['name'])
+_BOOK_COLUMNS = {'author_id': int, 'name': str}
+# Lower-cased names are interned, so both name indexes share one key string per book
+_BOOK_INDEXES = {
+    'author_id': Index(key=lambda b: b['author_id'], sql='author_id'),
+    'author_id_name': Index(
+        key=lambda b: (b['author_id'], sys.intern(b['name'].lower())),
+        unique=True,
+        ordered=True,
+        sql='author_id, lower(name)',
+    ),
+    'name': Index(key=lambda b: sys.intern(b['name'].lower()), ordered=True, sql='lower(name)'),
+    'name_tokens': Index(key=lambda b: tokenize(b['name']), tokens=True),
+}
 
 
-def _extract_book(book_id: int, books: list[BookType]) -> BookType:
-    books = {a.id: a for a in books}
-    if book_id not in books:
-        raise NotFoundError(f'Book(id={book_id}) Not Found')
-
-    return books[book_id]
+def _load_book_type(book: dict[str, Any]) -> BookType:
+    return BookType(id=book['id'], author_id=book['author_id'], name=book['name'])
 
 
 class BookService:
     __filename = 'books.json'
 
     def __init__(self, settings: Settings):
-        self.__file_path = os.path.join(settings.DATABASE_PATH, BookService.__filename)
+        self.__table = get_table(settings, BookService.__filename, indexes=_BOOK_INDEXES, columns=_BOOK_COLUMNS)
         self.__author_service = AuthorService(settings)
 
     async def get_books(self) -> list[BookType]:
-        async with open(self.__file_path, 'r') as file:
-            content = await file.read()
-            books = json.loads(content) if content else []
-
-        return [_load_book_type(b) for b in books]
+        await self.__table.refresh()
+        return [_load_book_type(b) for b in self.__table.all()]
 
     async def get_books_by_author_id(self, author_id: int) -> list[BookType]:
-        books = await self.get_books()
-        return [b for b in books if b.author_id == author_id]
+        return [_load_book_type(b) for b in await self.__table.find('author_id', author_id)]
+
+    async def get_books_by_author_ids(self, author_ids: list[int]) -> dict[int, list[BookType]]:
+        await self.__table.refresh()
+        return {i: [_load_book_type(b) for b in self.__table.filter('author_id', i)] for i in author_ids}
+
+    async def get_books_page(
+            self,
+            first: int | None,
+            after: Position | None = None,
+            *,
+            author_id: int | None = None,
+            name_prefix: str = '',
+    ) -> tuple[list[tuple[Position, BookType]], bool]:
+        """
+        Returns books paired with their pagination positions. Without `name_prefix` books come in id order,
+        otherwise in (lower-cased name, id) order along an ordered index, so only matching books are visited.
+        """
+        await self.__table.refresh()
+        return self._page(first, after, author_id, name_prefix)
+
+    async def get_author_books_pages(self, pages: list[tuple[int, int | None, str]]) -> list[list[BookType]]:
+        """The first page of books of every (author_id, first, name_prefix), from one refresh of the table"""
+        await self.__table.refresh()
+        return [
+            [book for _, book in self._page(first, None, author_id, name_prefix)[0]]
+            for author_id, first, name_prefix in pages
+        ]
+
+    def _page(
+            self, first: int | None, after: Position | None, author_id: int | None, name_prefix: str
+    ) -> tuple[list[tuple[Position, BookType]], bool]:
+        if not name_prefix:
+            books, has_next_page = self.__table.page(
+                first, after, index_name=None if author_id is None else 'author_id', key=author_id
+            )
+            return [(b['id'], _load_book_type(b)) for b in books], has_next_page
+
+        name_prefix = name_prefix.lower()
+        if author_id is None:
+            entries, has_next_page = self.__table.scan(
+                'name', name_prefix, lambda name: name.startswith(name_prefix), first, after
+            )
+        else:
+            entries, has_next_page = self.__table.scan(
+                'author_id_name',
+                (author_id, name_prefix),
+                lambda key: key[0] == author_id and key[1].startswith(name_prefix),
+                first,
+                after and ((author_id, after[0]), after[1]),
+            )
+        return [((b['name'].lower(), b['id']), _load_book_type(b)) for _, b in entries], has_next_page
+
+    async def search_books(self, query: str, first: int | None = None) -> list[BookType]:
+        """Books whose name holds every word of `query`, the last word may be incomplete"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        await self.__table.refresh()
+        return [_load_book_type(b) for b in self.__table.search('name_tokens', terms, first)]
+
+    async def get_changes(self, since: tuple[str, int] | None) -> tuple[list[BookType], list[int], tuple[str, int]]:
+        """
+        Books created or updated and ids of books deleted after the `since` version, with the current version.
+        Without `since` every book is returned. VersionExpiredError means `since` is no longer in the change log.
+        """
+        await self.__table.refresh()
+        version = (self.__table.log_id, self.__table.generation)
+        if since is None:
+            return [_load_book_type(b) for b in self.__table.all()], [], version
+
+        changes = self.__table.changes_since(*since)
+        if changes is None:
+            raise VersionExpiredError('Books version expired')
+        books, deleted_ids = changes
+        return [_load_book_type(b) for b in books], deleted_ids, version
 
     async def get_book_by_id(self, book_id: int) -> BookType:
-        book = _extract_book(book_id, books=await self.get_books())
-        return book
+        books = await self.__table.find(None, book_id, limit=1)
+        if not books:
+            raise NotFoundError(f'Book(id={book_id}) Not Found')
+
+        return _load_book_type(books[0])
 
     async def create_book(self, author_id: int, name: str) -> BookType:
-        await self._validate_book(author_id, name)
+        async with self.__table.transaction():
+            await self.__author_service.get_author_by_id(author_id)
+            self._validate_book(author_id, name)
 
-        books = await self.get_books()
+            new_book = BookType(id=self.__table.next_id(), author_id=author_id, name=name)
+            await self.__table.insert(strawberry_to_dict(new_book, exclude={'author'}))
 
-        new_book = BookType(id=await self._get_next_id(), author_id=author_id, name=name)
-        books.append(new_book)
+        get_broker().publish(BOOK_CREATED, new_book)
+        return new_book
 
-        books_data = [strawberry_to_dict(b, exclude={'author'}) for b in books]
-        async with open(self.__file_path, 'w') as file:
-            await file.write(json.dumps(books_data))
+    async def create_books(self, books: list[tuple[int, str]]) -> list[BookType | NotFoundError | AlreadyExistError]:
+        """Creates every valid (author_id, name) pair in one commit, failed items are returned as errors"""
+        results, changes, batch_keys = [], [], set()
+        async with self.__table.transaction():
+            authors = await self.__author_service.get_authors_by_ids([author_id for author_id, _ in books])
+            for author_id, name in books:
+                try:
+                    if author_id not in authors:
+                        raise NotFoundError(f'Author(id={author_id}) Not Found')
+                    self._validate_book(author_id, name)
+                    if (author_id, name.lower()) in batch_keys:
+                        raise AlreadyExistError('Book with this name already exist for this Author')
+                except (NotFoundError, AlreadyExistError) as e:
+                    results.append(e)
+                    continue
 
-        return new_book
+                new_book = BookType(id=self.__table.next_id() + len(changes), author_id=author_id, name=name)
+                changes.append(Change('insert', strawberry_to_dict(new_book, exclude={'author'})))
+                batch_keys.add((author_id, name.lower()))
+                results.append(new_book)
 
-    async def _validate_book(self, author_id: int, name: str) -> None:
-        await self.__author_service.get_author_by_id(author_id)
+            if changes:
+                await self.__table.commit(changes)
 
-        books = await self.get_books()
-        for b in books:
-            if b.name.lower() == name.lower() and b.author_id == author_id:
-                raise AlreadyExistError('Book with this name already exist for this Author')
+        broker = get_broker()
+        for book in results:
+            if isinstance(book, BookType):
+                broker.publish(BOOK_CREATED, book)
+        return results
 
-    async def _get_next_id(self) -> int:
-        books = await self.get_books()
-        if not books:
-            return 1
+    async def update_book(self, book_id: int, author_id: int, name: str) -> BookType:
+        """Replaces the book's author and name, ReferenceNotFoundError means the new author does not exist"""
+        async with self.__table.transaction():
+            book = self.__table.get(book_id)
+            if book is None:
+                raise NotFoundError(f'Book(id={book_id}) Not Found')
+            if author_id != book['author_id']:
+                try:
+                    await self.__author_service.get_author_by_id(author_id)
+                except NotFoundError as e:
+                    raise ReferenceNotFoundError(str(e)) from None
+            self._validate_book(author_id, name, book_id=book_id)
+
+            book = BookType(id=book_id, author_id=author_id, name=name)
+            await self.__table.update(strawberry_to_dict(book, exclude={'author'}))
+
+        get_broker().publish(BOOK_UPDATED, book)
+        return book
 
-        last_id = max(a.id for a in books)
-        return last_id + 1
+    def _validate_book(self, author_id: int, name: str, *, book_id: int | None = None) -> None:
+        """Names are unique per author regardless of case, `book_id` is the book being changed"""
+        book = self.__table.lookup('author_id_name', (author_id, name.lower()))
+        if book is not None and book['id'] != book_id:
+            raise AlreadyExistError('Book with this name already exist for this Author')
 
     async def delete_book(self, book_id: int) -> None:
-        books = await self.get_books()
-        book = _extract_book(book_id, books)
+        async with self.__table.transaction():
+            if self.__table.get(book_id) is None:
+                raise NotFoundError(f'Book(id={book_id}) Not Found')
+
+            await self.__table.delete(book_id)
+
+        get_broker().publish(BOOK_DELETED, book_id)
+
+    async def delete_books(self, book_ids: list[int]) -> list[NotFoundError | None]:
+        """Deletes every existing book in one commit, missing ids are returned as errors"""
+        results, changes, deleted_ids = [], [], set()
+        async with self.__table.transaction():
+            for book_id in book_ids:
+                book = self.__table.get(book_id)
+                if book is None or book_id in deleted_ids:
+                    results.append(NotFoundError(f'Book(id={book_id}) Not Found'))
+                    continue
+
+                changes.append(Change('delete', book))
+                deleted_ids.add(book_id)
+                results.append(None)
+
+            if changes:
+                await self.__table.commit(changes)
+
+        broker = get_broker()
+        for change in changes:
+            broker.publish(BOOK_DELETED, change.row['id'])
+        return results
+
+    @asynccontextmanager
+    async def deleting_author_books(self, author_id: int, *, cascade: bool) -> AsyncIterator[None]:
+        """
+        Holds the books write lock while the body deletes the author, so no book can be added for them meanwhile.
+        The author's books are found through the `author_id` index. With `cascade` they are deleted in one commit
+        before the body runs and restored if it fails, otherwise ReferencedError is raised when there are any.
+        Books go first, so a crash in between leaves an author without books rather than orphaned books.
+        """
+        async with self.__table.transaction():
+            books = self.__table.filter('author_id', author_id)
+            if books and not cascade:
+                raise ReferencedError(f'Author(id={author_id}) has {len(books)} Books')
+
+            if books:
+                await self.__table.commit([Change('delete', b) for b in books])
+            try:
+                yield
+            except BaseException:
+                if books:
+                    await self.__table.commit([Change('insert', b) for b in books])
+                raise
 
-        updated_books = [strawberry_to_dict(b, exclude={'author'}) for b in books if b.id != book.id]
-        async with open(self.__file_path, 'w') as f:
-            await f.write(json.dumps(updated_books))
+        broker = get_broker()
+        for book in books:
+            broker.publish(BOOK_DELETED, book['id'])
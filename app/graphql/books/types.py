@@ -26,7 +26,4 @@ class BookType:
 
     @strawberry.field
     async def author(self, info: Info) -> Annotated['AuthorType', strawberry.lazy('app.graphql.authors.types')]:
-        from app.graphql.authors.service import AuthorService
-
-        service = AuthorService(settings=info.context['settings'])
-        return await service.get_author_by_id(self.author_id)
+        return await info.context['author_loader'].load(self.author_id)
@@ -0,0 +1,81 @@
+import base64
+import json
+
+import strawberry
+from strawberry.types import Info
+
+from app.exceptions import VersionExpiredError
+from app.graphql.authors.service import AuthorService
+from app.graphql.authors.types import AuthorType
+from app.graphql.books.service import BookService
+from app.graphql.books.types import BookType
+
+# Per table: the id of its change log and the generation reached in it
+TableVersion = tuple[str, int]
+
+
+@strawberry.type(name='Changes')
+class ChangesType:
+    version: str
+    authors: list[AuthorType]
+    deleted_author_ids: list[int]
+    books: list[BookType]
+    deleted_book_ids: list[int]
+
+
+@strawberry.type(name='VersionExpired')
+class VersionExpiredResponse:
+    message: str = 'Version expired'
+
+
+ChangesResponse = strawberry.union('ChangesResponse', (ChangesType, VersionExpiredResponse))
+
+
+def encode_version(authors: TableVersion, books: TableVersion) -> str:
+    return base64.urlsafe_b64encode(f'version:{json.dumps([authors, books], separators=(",", ":"))}'.encode()).decode()
+
+
+def decode_version(version: str | None) -> tuple[TableVersion, TableVersion] | None:
+    if version is None:
+        return None
+
+    try:
+        prefix, versions = base64.urlsafe_b64decode(version.encode()).decode().split(':', 1)
+        versions = json.loads(versions)
+        valid = prefix == 'version' and isinstance(versions, list) and len(versions) == 2 and all(
+            isinstance(v, list) and len(v) == 2 and type(v[0]) is str and type(v[1]) is int for v in versions
+        )
+        if not valid:
+            raise ValueError
+        return tuple(versions[0]), tuple(versions[1])
+    except ValueError:
+        raise ValueError(f'Invalid version "{version}"') from None
+
+
+@strawberry.type
+class ChangesQuery:
+    @strawberry.field
+    async def changes(self, info: Info, since: str | None = None) -> ChangesResponse:
+        """
+        Authors and books created or updated and the ids of those deleted after the `since` version, each in its
+        latest state, plus the version to pass next time. Without `since` every row is returned.
+        VersionExpired asks the client to start over without `since`. Versions are kept by the serving worker and
+        expire whenever another one writes, so deployments relying on deltas run a single worker.
+        """
+        versions = decode_version(since)
+        author_service = AuthorService(settings=info.context['settings'])
+        book_service = BookService(settings=info.context['settings'])
+        try:
+            # Books are read first: the author of every returned book was committed before it, so it is returned too
+            books, deleted_book_ids, books_version = await book_service.get_changes(versions and versions[1])
+            authors, deleted_author_ids, authors_version = await author_service.get_changes(versions and versions[0])
+        except VersionExpiredError as e:
+            return VersionExpiredResponse(message=str(e))
+
+        return ChangesType(
+            version=encode_version(authors_version, books_version),
+            authors=authors,
+            deleted_author_ids=deleted_author_ids,
+            books=books,
+            deleted_book_ids=deleted_book_ids,
+        )
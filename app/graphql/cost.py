@@ -0,0 +1,152 @@
+from typing import Any, Iterator
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    get_named_type,
+    get_nullable_type,
+    GraphQLError,
+    GraphQLField,
+    GraphQLInterfaceType,
+    GraphQLNamedType,
+    GraphQLObjectType,
+    InlineFragmentNode,
+    is_list_type,
+    SelectionSetNode,
+    Undefined,
+    value_from_ast_untyped,
+)
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+
+from app.core.config import Settings
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Statically estimates the cost of an operation before it is validated and executed.
+    Every selected field costs 1 per parent item. List fields multiply their selection by the `first` argument
+    that paginates them, or by Settings.QUERY_DEFAULT_LIST_SIZE. Aliases and fragments are counted per use.
+    Operations above Settings.QUERY_MAX_COST are rejected, the computed cost is reported in the response extensions.
+    """
+
+    def __init__(self, *, execution_context: ExecutionContext):
+        self.execution_context = execution_context
+        self.cost: int | None = None
+        self._fragments: dict[str, FragmentDefinitionNode] = {}
+        self._variables: dict[str, Any] = {}
+
+    @property
+    def settings(self) -> Settings:
+        return self.execution_context.context['settings']
+
+    def on_validate(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        operation = get_operation_ast(execution_context.graphql_document, execution_context.operation_name)
+        if execution_context.errors or operation is None:
+            yield
+            return
+
+        self._fragments = {
+            d.name.value: d for d in execution_context.graphql_document.definitions
+            if isinstance(d, FragmentDefinitionNode)
+        }
+        self._variables = execution_context.variables or {}
+        root_type = execution_context.schema._schema.get_root_type(operation.operation)
+        self.cost = self._selection_cost(operation.selection_set, root_type, multiplier=1, page_size=None)
+
+        if self.cost > self.settings.QUERY_MAX_COST:
+            execution_context.errors = [
+                GraphQLError(
+                    f'Query cost {self.cost} exceeds maximum allowed cost {self.settings.QUERY_MAX_COST}',
+                    nodes=[operation],
+                )
+            ]
+        yield
+
+    def get_results(self) -> dict[str, Any]:
+        if self.cost is None:
+            return {}
+        return {'cost': {'requested': self.cost, 'maximum': self.settings.QUERY_MAX_COST}}
+
+    def _selection_cost(
+            self,
+            selection_set: SelectionSetNode,
+            parent_type: GraphQLNamedType | None,
+            *,
+            multiplier: int,
+            page_size: int | None,
+            visited_fragments: frozenset[str] = frozenset(),
+    ) -> int:
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field = self._get_field(parent_type, selection.name.value)
+                if field is None:
+                    continue
+
+                cost += multiplier
+                if selection.selection_set is not None:
+                    size, child_page_size = self._field_size(selection, field, page_size)
+                    cost += self._selection_cost(
+                        selection.selection_set,
+                        get_named_type(field.type),
+                        multiplier=multiplier * size,
+                        page_size=child_page_size,
+                        visited_fragments=visited_fragments,
+                    )
+            elif isinstance(selection, InlineFragmentNode):
+                cost += self._selection_cost(
+                    selection.selection_set,
+                    self._get_type(selection.type_condition.name.value) if selection.type_condition else parent_type,
+                    multiplier=multiplier,
+                    page_size=page_size,
+                    visited_fragments=visited_fragments,
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self._fragments.get(selection.name.value)
+                if fragment is None or fragment.name.value in visited_fragments:
+                    continue
+
+                cost += self._selection_cost(
+                    fragment.selection_set,
+                    self._get_type(fragment.type_condition.name.value),
+                    multiplier=multiplier,
+                    page_size=page_size,
+                    visited_fragments=visited_fragments | {fragment.name.value},
+                )
+        return cost
+
+    def _field_size(self, node: FieldNode, field: GraphQLField, page_size: int | None) -> tuple[int, int | None]:
+        """
+        Returns how many items the field resolves to and the page size its list children are limited to.
+        A `first` argument on a list field limits the field itself, on a connection it limits the `edges` below.
+        """
+        first = self._argument_value(node, field, 'first')
+        first = max(first, 0) if isinstance(first, int) else None
+        if is_list_type(get_nullable_type(field.type)):
+            size = next(s for s in (first, page_size, self.settings.QUERY_DEFAULT_LIST_SIZE) if s is not None)
+            return size, None
+        return 1, first
+
+    def _argument_value(self, node: FieldNode, field: GraphQLField, name: str) -> Any:
+        if name not in field.args:
+            return None
+
+        for argument in node.arguments:
+            if argument.name.value == name:
+                return value_from_ast_untyped(argument.value, self._variables)
+
+        default_value = field.args[name].default_value
+        return None if default_value is Undefined else default_value
+
+    def _get_type(self, name: str) -> GraphQLNamedType | None:
+        return self.execution_context.schema._schema.get_type(name)
+
+    @staticmethod
+    def _get_field(parent_type: GraphQLNamedType | None, name: str) -> GraphQLField | None:
+        if name.startswith('__') or not isinstance(parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
+            return None
+        return parent_type.fields.get(name)
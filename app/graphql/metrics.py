@@ -0,0 +1,76 @@
+from inspect import isawaitable
+import time
+from typing import Any, Awaitable, Callable, Iterator
+
+from graphql import GraphQLResolveInfo
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+
+from app.core.metrics import CallbackMetric, Histogram
+
+OPERATION_SECONDS = Histogram(
+    'graphql_operation_seconds', 'Time spent on a GraphQL operation from parsing to the result', ('type', 'status')
+)
+RESOLVER_SECONDS = Histogram(
+    'graphql_resolver_seconds', 'Time spent in asynchronous field resolvers, e.g. Query.authors', ('field',)
+)
+
+_caches: dict[str, Callable] = {}
+
+
+def _cache_info(attribute: str) -> dict[tuple[str, ...], float]:
+    return {(name,): getattr(cached.cache_info(), attribute) for name, cached in _caches.items()}
+
+
+CACHE_HITS = CallbackMetric(
+    'graphql_cache_hits_total', 'Parse and validation cache hits', 'counter', ('cache',), lambda: _cache_info('hits')
+)
+CACHE_MISSES = CallbackMetric(
+    'graphql_cache_misses_total',
+    'Parse and validation cache misses',
+    'counter',
+    ('cache',),
+    lambda: _cache_info('misses'),
+)
+
+
+def track_cache(name: str, cached: Callable) -> None:
+    """Reports the hits and misses of an lru_cache wrapped function, e.g. the one of strawberry's ParserCache"""
+    _caches[name] = cached
+
+
+class MetricsExtension(SchemaExtension):
+    """
+    Records the latency of every operation by type and outcome, and of every resolver that returns an awaitable:
+    root fields and fields such as Author.books or Book.author. Plain attribute fields resolve synchronously and are
+    passed through untimed, so the per-field cost stays one type check.
+    """
+
+    def __init__(self, *, execution_context: ExecutionContext):
+        self.execution_context = execution_context
+
+    def on_operation(self) -> Iterator[None]:
+        started = time.perf_counter()
+        yield
+
+        execution_context = self.execution_context
+        try:
+            operation_type = execution_context.operation_type.value
+        except RuntimeError:
+            operation_type = 'unknown'
+        status = 'error' if execution_context.errors else 'ok'
+        OPERATION_SECONDS.observe(time.perf_counter() - started, operation_type, status)
+
+    def resolve(self, _next: Callable, root: Any, info: GraphQLResolveInfo, *args: str, **kwargs: Any) -> Any:
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return _timed(result, f'{info.parent_type.name}.{info.field_name}')
+        return result
+
+
+async def _timed(result: Awaitable, field: str) -> Any:
+    started = time.perf_counter()
+    try:
+        return await result
+    finally:
+        RESOLVER_SECONDS.observe(time.perf_counter() - started, field)
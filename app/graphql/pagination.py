@@ -0,0 +1,78 @@
+import base64
+import json
+from typing import Any, Generic, TypeVar
+
+import strawberry
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+T = TypeVar('T')
+# Where a node sits in the ordering of its listing: its id, or a (lower-cased name, id) pair for name-ordered listings
+Position = int | tuple[str, int]
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: str | None
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: list[Edge[T]]
+    page_info: PageInfo
+
+
+def encode_cursor(position: Position) -> str:
+    return base64.urlsafe_b64encode(f'cursor:{json.dumps(position, separators=(",", ":"))}'.encode()).decode()
+
+
+def decode_cursor(cursor: str | None, *, by_name: bool = False) -> Position | None:
+    """Decodes a cursor, expecting an id position or with `by_name` a (name, id) position"""
+    if cursor is None:
+        return None
+
+    try:
+        prefix, position = base64.urlsafe_b64decode(cursor.encode()).decode().split(':', 1)
+        if prefix != 'cursor':
+            raise ValueError
+        position = _to_tuple(json.loads(position))
+        if by_name:
+            valid = isinstance(position, tuple) and len(position) == 2 and _is_instances(position, (str, int))
+        else:
+            valid = type(position) is int
+        if not valid:
+            raise ValueError
+        return position
+    except ValueError:
+        raise ValueError(f'Invalid cursor "{cursor}"') from None
+
+
+def _is_instances(values: tuple, types: tuple[type, ...]) -> bool:
+    return all(type(v) is t for v, t in zip(values, types))
+
+
+def _to_tuple(value: Any) -> Any:
+    return tuple(_to_tuple(v) for v in value) if isinstance(value, list) else value
+
+
+def validate_first(first: int) -> int:
+    if not 0 <= first <= MAX_PAGE_SIZE:
+        raise ValueError(f'"first" must be between 0 and {MAX_PAGE_SIZE}')
+    return first
+
+
+def create_connection(nodes: list[tuple[Position, T]], has_next_page: bool) -> Connection[T]:
+    """Builds a connection from (position, node) pairs"""
+    edges = [Edge(cursor=encode_cursor(position), node=node) for position, node in nodes]
+    return Connection(
+        edges=edges,
+        page_info=PageInfo(has_next_page=has_next_page, end_cursor=edges[-1].cursor if edges else None),
+    )
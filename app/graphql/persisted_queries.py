@@ -0,0 +1,127 @@
+from collections import OrderedDict
+import hashlib
+import json
+from typing import Any
+
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLHTTPResponse, GraphQLRequestData
+from strawberry.http.async_base_view import AsyncHTTPRequestAdapter
+from strawberry.http.exceptions import HTTPException
+from strawberry.types import ExecutionResult
+
+from app.core.codec import JsonCodec, STDLIB_CODEC
+from app.core.config import Settings
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+    def as_graphql_error(self) -> GraphQLError:
+        return GraphQLError(str(self), extensions={'code': self.code})
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    Bounded LRU store of GraphQL documents keyed by their sha256 hash, following the Apollo APQ protocol.
+    In allow-list mode only the pre-registered documents can be executed and nothing new is registered.
+    """
+
+    def __init__(self, maxsize: int, allow_list: list[str] | None = None):
+        self.maxsize = maxsize
+        self.allow_list_only = allow_list is not None
+        self._queries: OrderedDict[str, str] = OrderedDict((query_hash(q), q) for q in allow_list or ())
+
+    def resolve(self, query: str | None, persisted_query: dict[str, Any] | None) -> str | None:
+        if persisted_query is None:
+            if self.allow_list_only and query is not None and query_hash(query) not in self._queries:
+                raise PersistedQueryError('PersistedQueryNotAllowed', code='PERSISTED_QUERY_NOT_ALLOWED')
+            return query
+
+        if persisted_query.get('version') != 1:
+            raise PersistedQueryError('Unsupported persisted query version', code='PERSISTED_QUERY_UNSUPPORTED')
+
+        sha256_hash = persisted_query.get('sha256Hash')
+        if query is None:
+            if sha256_hash not in self._queries:
+                raise PersistedQueryError('PersistedQueryNotFound', code='PERSISTED_QUERY_NOT_FOUND')
+            if not self.allow_list_only:
+                self._queries.move_to_end(sha256_hash)
+            return self._queries[sha256_hash]
+
+        if query_hash(query) != sha256_hash:
+            raise PersistedQueryError('provided sha does not match query', code='INVALID_SHA256_HASH')
+        if self.allow_list_only:
+            if sha256_hash not in self._queries:
+                raise PersistedQueryError('PersistedQueryNotAllowed', code='PERSISTED_QUERY_NOT_ALLOWED')
+            return query
+
+        self._queries[sha256_hash] = query
+        self._queries.move_to_end(sha256_hash)
+        if len(self._queries) > self.maxsize:
+            self._queries.popitem(last=False)
+        return query
+
+
+def create_persisted_query_store(settings: Settings) -> PersistedQueryStore:
+    allow_list = None
+    if settings.PERSISTED_QUERIES_PATH is not None:
+        with open(settings.PERSISTED_QUERIES_PATH) as file:
+            allow_list = json.load(file)
+
+    return PersistedQueryStore(maxsize=settings.PERSISTED_QUERIES_MAXSIZE, allow_list=allow_list)
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """
+    GraphQLRouter accepting `extensions.persistedQuery` in JSON bodies and GET query params.
+    Request bodies and responses go through `codec`.
+    """
+
+    def __init__(self, *args, persisted_queries: PersistedQueryStore, codec: JsonCodec = STDLIB_CODEC, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.persisted_queries = persisted_queries
+        self.codec = codec
+
+    def parse_json(self, data: str | bytes) -> dict[str, Any]:
+        try:
+            return self.codec.loads(data)
+        except ValueError as e:
+            raise HTTPException(400, 'Unable to parse request body as JSON') from e
+
+    def encode_json(self, response_data: GraphQLHTTPResponse) -> bytes:
+        return self.codec.dumps(response_data)
+
+    def should_render_graphiql(self, request: AsyncHTTPRequestAdapter) -> bool:
+        return 'extensions' not in request.query_params and super().should_render_graphiql(request)
+
+    async def execute_operation(self, *args, **kwargs) -> ExecutionResult:
+        try:
+            return await super().execute_operation(*args, **kwargs)
+        except PersistedQueryError as e:
+            return ExecutionResult(data=None, errors=[e.as_graphql_error()])
+
+    async def parse_http_body(self, request: AsyncHTTPRequestAdapter) -> GraphQLRequestData:
+        content_type = request.content_type or ''
+        if 'application/json' in content_type:
+            data = self.parse_json(await request.get_body())
+        elif request.method == 'GET':
+            data = self.parse_query_params(request.query_params)
+        else:
+            return await super().parse_http_body(request)
+
+        extensions = data.get('extensions') or {}
+        if isinstance(extensions, str):
+            extensions = self.parse_json(extensions)
+
+        return GraphQLRequestData(
+            query=self.persisted_queries.resolve(data.get('query'), extensions.get('persistedQuery')),
+            variables=data.get('variables'),  # type: ignore
+            operation_name=data.get('operationName'),
+        )
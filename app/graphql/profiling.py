@@ -0,0 +1,126 @@
+import cProfile
+import hmac
+import os
+import pstats
+import time
+from typing import Any, Iterator
+
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+
+from app.core.config import Settings
+
+TOP_FUNCTIONS = 30
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cProfile hooks the whole thread, so only one operation at a time is profiled
+_profiling = False
+
+
+class ProfilingExtension(SchemaExtension):
+    """
+    Profiles operations sent with the PROFILING_HEADER header and adds `extensions.profile` to their response:
+    the duration of the parse, validate and execute phases, the functions with the highest cumulative time
+    (pydantic validation, JSON decoding and dataclass construction included), and the same for the functions of
+    this package alone: resolvers, services, loaders and storage.
+    With PROFILING_DIR the full cProfile stats are also written there, for pstats or snakeviz.
+
+    Other requests interleaving on the event loop while the profiled one awaits are part of the profile,
+    and work in executor threads (JSON offloading, aiofiles) only shows up as the time spent awaiting it.
+    Requests without the header only pay a header lookup per operation and a flag check per phase.
+    """
+
+    def __init__(self, *, execution_context: ExecutionContext):
+        self.execution_context = execution_context
+        self._phases: dict[str, float] | None = None
+        self._results: dict[str, Any] = {}
+
+    def on_operation(self) -> Iterator[None]:
+        global _profiling
+
+        if _profiling or not _is_requested(self.execution_context.context):
+            yield
+            return
+
+        _profiling = True
+        self._phases = {}
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _profiling = False
+
+        self._phases['total_ms'] = (time.perf_counter() - started) * 1000
+        stats = pstats.Stats(profiler)
+        self._results = {
+            'phases': self._phases,
+            'functions': _top_functions(stats),
+            'app_functions': _top_functions(stats, APP_DIR),
+        }
+        settings: Settings = self.execution_context.context['settings']
+        if settings.PROFILING_DIR:
+            self._results['file'] = self._dump(profiler, settings.PROFILING_DIR)
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._phase('parse_ms')
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._phase('validate_ms')
+
+    def on_execute(self) -> Iterator[None]:
+        yield from self._phase('execute_ms')
+
+    def get_results(self) -> dict[str, Any]:
+        return {'profile': self._results} if self._results else {}
+
+    def _phase(self, name: str) -> Iterator[None]:
+        if self._phases is None:
+            yield
+            return
+
+        started = time.perf_counter()
+        yield
+        self._phases[name] = (time.perf_counter() - started) * 1000
+
+    def _dump(self, profiler: cProfile.Profile, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        operation_name = self.execution_context.operation_name or 'anonymous'
+        file_path = os.path.join(directory, f'{time.strftime("%Y%m%dT%H%M%S")}-{time.time_ns()}-{operation_name}.prof')
+        profiler.dump_stats(file_path)
+        return file_path
+
+
+def _is_requested(context: dict) -> bool:
+    settings: Settings = context['settings']
+    request = context.get('request')
+    value = request.headers.get(settings.PROFILING_HEADER) if request is not None else None
+    if value is None:
+        return False
+    return settings.PROFILING_TOKEN is None or hmac.compare_digest(value.encode(), settings.PROFILING_TOKEN.encode())
+
+
+def _top_functions(stats: pstats.Stats, directory: str = '') -> list[dict[str, Any]]:
+    """Functions defined under `directory` by cumulative time, coroutines count one call per resumption"""
+    rows = [item for item in stats.stats.items() if item[0][0].startswith(directory)]
+    rows = sorted(rows, key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+    return [
+        {
+            'function': f'{_short_path(file_name)}:{line}({function_name})',
+            'calls': calls,
+            'total_ms': total_time * 1000,
+            'cumulative_ms': cumulative_time * 1000,
+        }
+        for (file_name, line, function_name), (_, calls, total_time, cumulative_time, _) in rows
+    ]
+
+
+def _short_path(file_name: str) -> str:
+    _, separator, package_path = file_name.rpartition('site-packages' + os.sep)
+    if separator:
+        return package_path
+    if file_name.startswith(os.getcwd() + os.sep):
+        return os.path.relpath(file_name)
+    return file_name
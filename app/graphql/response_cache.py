@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+import json
+import time
+from typing import Any, AsyncIterator, Hashable
+
+from graphql import ExecutionResult as GraphQLExecutionResult
+from graphql import get_named_type, GraphQLSchema, is_abstract_type, TypeInfo, TypeInfoVisitor, visit, Visitor
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+from strawberry.types.graphql import OperationType
+
+from app.core.config import get_settings, Settings
+from app.graphql.persisted_queries import query_hash
+from app.storage.table import find_table, Table
+
+ENTITY_TABLES = {
+    'Author': 'authors.json',
+    'Book': 'books.json',
+}
+
+
+@dataclass(slots=True)
+class _Entry:
+    data: dict[str, Any]
+    expires_at: float
+    generations: tuple[tuple[Table, int], ...]
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of query results. Every entry remembers the generation of each table it was built from
+    and is dropped as soon as one of them commits or reloads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    async def get(self, key: Hashable) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        # The freshness check awaits table refreshes, concurrent requests may evict or replace the key meanwhile
+        if entry is not None and not await self._is_fresh(entry):
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            self.invalidations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.data
+
+    def set(self, key: Hashable, data: dict[str, Any], generations: tuple[tuple[Table, int], ...]) -> None:
+        self._entries[key] = _Entry(data=data, expires_at=time.monotonic() + self.ttl, generations=generations)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    @staticmethod
+    async def _is_fresh(entry: _Entry) -> bool:
+        if entry.expires_at < time.monotonic():
+            return False
+
+        for table, generation in entry.generations:
+            await table.refresh()
+            if table.generation != generation:
+                return False
+        return True
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(maxsize=settings.RESPONSE_CACHE_MAXSIZE, ttl=settings.RESPONSE_CACHE_TTL)
+
+
+class _EntityTypesCollector(Visitor):
+    """
+    Collects the names of the object types an operation can read: the parent and return type of every field,
+    with unions and interfaces expanded to all of their possible types.
+    """
+
+    def __init__(self, schema: GraphQLSchema, type_info: TypeInfo):
+        super().__init__()
+        self.schema = schema
+        self.type_info = type_info
+        self.type_names = set()
+
+    def enter_field(self, *_) -> None:
+        for field_type in (self.type_info.get_parent_type(), self.type_info.get_type()):
+            if field_type is None:
+                continue
+            named_type = get_named_type(field_type)
+            self.type_names.add(named_type.name)
+            if is_abstract_type(named_type):
+                self.type_names.update(t.name for t in self.schema.get_possible_types(named_type))
+
+
+class ResponseCacheExtension(SchemaExtension):
+    """
+    Serves query operations from the ResponseCache in the context, keyed by (document hash, variables, operation name).
+    Results are only stored when the entity tables they read did not change while the operation executed.
+    """
+
+    def __init__(self, *, execution_context: ExecutionContext):
+        self.execution_context = execution_context
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        execution_context = self.execution_context
+        cache: ResponseCache = execution_context.context['response_cache']
+        if cache.maxsize <= 0 or execution_context.operation_type != OperationType.QUERY:
+            yield
+            return
+
+        key = (
+            query_hash(execution_context.query),
+            json.dumps(execution_context.variables, sort_keys=True),
+            execution_context.operation_name,
+        )
+        data = await cache.get(key)
+        if data is not None:
+            execution_context.result = GraphQLExecutionResult(data=data, errors=None)
+            yield
+            return
+
+        generations = await self._table_generations(execution_context.context['settings'])
+        yield
+
+        result = execution_context.result
+        if generations is None or result is None or result.errors or result.data is None:
+            return
+        if all(table.generation == generation for table, generation in generations):
+            cache.set(key, result.data, generations)
+
+    async def _table_generations(self, settings: Settings) -> tuple[tuple[Table, int], ...] | None:
+        schema = self.execution_context.schema._schema
+        type_info = TypeInfo(schema)
+        collector = _EntityTypesCollector(schema, type_info)
+        visit(self.execution_context.graphql_document, TypeInfoVisitor(type_info, collector))
+
+        generations = []
+        for type_name in collector.type_names & ENTITY_TABLES.keys():
+            table = find_table(settings, ENTITY_TABLES[type_name])
+            if table is None:
+                return None
+
+            await table.refresh()
+            generations.append((table, table.generation))
+        return tuple(generations)
@@ -0,0 +1,9 @@
+import re
+import sys
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased words of `text`, interned so a token index keeps one string per distinct word"""
+    return [sys.intern(w) for w in _WORD.findall(text.lower())]
@@ -1,6 +1,7 @@
-from typing import Any, Type
+from functools import lru_cache
+from typing import Any, Callable, Type
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, validate_model, ValidationError
 import strawberry
 from strawberry.extensions import FieldExtension
 from strawberry.extensions.field_extension import AsyncExtensionResolver
@@ -22,23 +23,87 @@ class ValidationErrorResponse:
     errors: list[ValidationErrorSchema]
 
 
+Validator = Callable[[object], BaseModel | ValidationError]
+
+
+@lru_cache
+def compile_validator(model: Type[BaseModel]) -> Validator:
+    """
+    Validates the attributes named after the model fields of an input object and returns the model or the error.
+    The fields are validated one by one and the model is built from the validated values without a second pass
+    through `BaseModel.__init__`. Models with root validators go through `validate_model` instead.
+    """
+    fields = tuple(model.__fields__.values())
+    if model.__pre_root_validators__ or model.__post_root_validators__:
+        def validate(input_schema: object) -> BaseModel | ValidationError:
+            values, fields_set, error = validate_model(model, {f.alias: getattr(input_schema, f.name) for f in fields})
+            return error or model.construct(fields_set, **values)
+        return validate
+
+    fields_set = frozenset(f.name for f in fields)
+
+    def validate(input_schema: object) -> BaseModel | ValidationError:
+        values, errors = {}, []
+        for field in fields:
+            value, error = field.validate(getattr(input_schema, field.name), values, loc=field.alias, cls=model)
+            if error:
+                errors.append(error)
+            else:
+                values[field.name] = value
+        if errors:
+            return ValidationError(errors, model)
+
+        instance = model.__new__(model)
+        object.__setattr__(instance, '__dict__', values)
+        object.__setattr__(instance, '__fields_set__', set(fields_set))
+        return instance
+
+    return validate
+
+
 class PydanticValidationExtension(FieldExtension):
+    """
+    Validates `input_schema` with the pydantic model before the resolver runs, and passes the validated model
+    to the resolver in place of the strawberry input: both expose the same attributes.
+    A list `input_schema` is validated item by item: only valid items reach the resolver
+    and the result keeps a ValidationErrorResponse in place of every invalid one.
+
+    Inputs are flat: the values are read straight from their attributes by the compiled validator of the model.
+    """
+
     def __init__(self, model: Type[BaseModel]):
         self.model = model
+        self._validate = compile_validator(model)
 
     async def resolve_async(self, next_: AsyncExtensionResolver, source: Any, info: Info, **kwargs):
-        if 'input_schema' in kwargs:
-            try:
-                self.model(**strawberry.asdict(kwargs['input_schema']))
-            except ValidationError as e:
-                return ValidationErrorResponse(
-                    message='Validation Error',
-                    errors=[
-                        ValidationErrorSchema(
-                            message=e['msg'], location=list(e['loc']), type=e['type'], ctx=e.get('ctx')
-                        )
-                        for e in e.errors()
-                    ]
-                )
-
-        return await next_(source, info, **kwargs)
+        if 'input_schema' not in kwargs:
+            return await next_(source, info, **kwargs)
+
+        if not isinstance(kwargs['input_schema'], list):
+            result = self.validate(kwargs['input_schema'])
+            if isinstance(result, ValidationErrorResponse):
+                return result
+            return await next_(source, info, **{**kwargs, 'input_schema': result})
+
+        results = self.validate_many(kwargs['input_schema'])
+        valid_items = [r for r in results if not isinstance(r, ValidationErrorResponse)]
+        resolved = iter(await next_(source, info, **{**kwargs, 'input_schema': valid_items}) if valid_items else ())
+        return [r if isinstance(r, ValidationErrorResponse) else next(resolved) for r in results]
+
+    def validate(self, input_schema: object) -> BaseModel | ValidationErrorResponse:
+        return self.validate_many([input_schema])[0]
+
+    def validate_many(self, inputs: list[object]) -> list[BaseModel | ValidationErrorResponse]:
+        validate = self._validate
+        results = [validate(i) for i in inputs]
+        return [_error_response(r) if isinstance(r, ValidationError) else r for r in results]
+
+
+def _error_response(error: ValidationError) -> ValidationErrorResponse:
+    return ValidationErrorResponse(
+        message='Validation Error',
+        errors=[
+            ValidationErrorSchema(message=e['msg'], location=list(e['loc']), type=e['type'], ctx=e.get('ctx'))
+            for e in error.errors()
+        ]
+    )
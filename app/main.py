@@ -1,16 +1,25 @@
 import logging
 
-from fastapi import Depends, FastAPI
+from fastapi import APIRouter, Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import strawberry
 from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
-from strawberry.fastapi import GraphQLRouter
 from strawberry.schema.config import StrawberryConfig
 from strawberry.tools import merge_types
 
+from app.core.codec import get_codec
 from app.core.config import get_settings, Settings
-from app.graphql.authors.queries import AuthorsMutation, AuthorsQuery
-from app.graphql.books.queries import BooksMutation, BooksQuery
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+from app.graphql.authors.loaders import create_author_loader
+from app.graphql.authors.queries import AuthorsMutation, AuthorsQuery, AuthorsSubscription
+from app.graphql.books.loaders import create_books_by_author_loader, create_books_page_by_author_loader
+from app.graphql.books.queries import BooksMutation, BooksQuery, BooksSubscription
+from app.graphql.changes import ChangesQuery
+from app.graphql.cost import QueryCostLimiter
+from app.graphql.metrics import MetricsExtension, track_cache
+from app.graphql.persisted_queries import create_persisted_query_store, PersistedQueryRouter
+from app.graphql.profiling import ProfilingExtension
+from app.graphql.response_cache import get_response_cache, ResponseCache, ResponseCacheExtension
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,17 +27,47 @@ logging.basicConfig(
 )
 
 
-async def _get_context(settings: Settings = Depends(get_settings)) -> dict:
+async def _get_context(
+        settings: Settings = Depends(get_settings), response_cache: ResponseCache = Depends(get_response_cache)
+) -> dict:
     return {
         'settings': settings,
+        'response_cache': response_cache,
+        'author_loader': create_author_loader(settings),
+        'books_by_author_loader': create_books_by_author_loader(settings),
+        'books_page_by_author_loader': create_books_page_by_author_loader(settings),
     }
 
 
+operations_router = APIRouter()
+
+
+@operations_router.get('/health-check')
+def health_check() -> bool:
+    return True
+
+
+@operations_router.get('/metrics')
+def metrics() -> Response:
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@operations_router.get('/response-cache')
+def response_cache_stats() -> dict[str, int]:
+    return get_response_cache().stats()
+
+
 def create_app() -> FastAPI:
     _app = FastAPI(title='LectureAPI', version='0.1.0')
 
-    graphql_router = GraphQLRouter(schema=create_graphql_schema(), context_getter=_get_context)
+    graphql_router = PersistedQueryRouter(
+        schema=create_graphql_schema(),
+        context_getter=_get_context,
+        persisted_queries=create_persisted_query_store(get_settings()),
+        codec=get_codec(get_settings().JSON_CODEC),
+    )
     _app.include_router(graphql_router, prefix='/graphql')
+    _app.include_router(operations_router)
 
     _app.add_middleware(
         CORSMiddleware,
@@ -41,28 +80,33 @@ def create_app() -> FastAPI:
 
 
 def create_graphql_schema() -> strawberry.Schema:
+    validation_cache, parser_cache = ValidationCache(maxsize=256), ParserCache(maxsize=256)
+    track_cache('validation', validation_cache.cached_validate_document)
+    track_cache('parse', parser_cache.cached_parse_document)
+
     extensions = (
         QueryDepthLimiter(max_depth=3),
-        ValidationCache(maxsize=256),
-        ParserCache(maxsize=256),
+        validation_cache,
+        QueryCostLimiter,
+        parser_cache,
+        ResponseCacheExtension,
+        *((MetricsExtension,) if get_settings().METRICS_ENABLED else ()),  # Operation and resolver timings
+        *((ProfilingExtension,) if get_settings().PROFILING_ENABLED else ()),  # Per-request profile behind a header
         # ApolloTracingExtension,  # Enable performance tracing
         # MaskErrors(),  # Hide error description, like "Debug=False"
     )
 
-    queries = (AuthorsQuery, BooksQuery)
+    queries = (AuthorsQuery, BooksQuery, ChangesQuery)
     mutations = (AuthorsMutation, BooksMutation)
+    subscriptions = (AuthorsSubscription, BooksSubscription)
 
     return strawberry.Schema(
         query=merge_types('Query', queries),
         mutation=merge_types('Mutation', mutations),
+        subscription=merge_types('Subscription', subscriptions),
         extensions=extensions,
         config=StrawberryConfig(auto_camel_case=False),
     )
 
 
 app = create_app()
-
-
-@app.get('/health-check')
-def health_check() -> bool:
-    return True
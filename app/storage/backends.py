@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+import os
+from typing import Any, AsyncIterator, Hashable, Literal, Mapping, Protocol
+
+from aiofiles import open
+
+from app.core.codec import JsonCodec, STDLIB_CODEC
+from app.core.metrics import Counter
+from app.storage.offload import INLINE, Offload
+from app.storage.stream import CHUNK_SIZE, iter_json_array
+
+Row = dict[str, Any]
+
+READ_BYTES = Counter('storage_read_bytes_total', 'Bytes of table files opened for loading', ('file',))
+WRITTEN_BYTES = Counter('storage_written_bytes_total', 'Bytes written to table files', ('file',))
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    operation: Literal['insert', 'update', 'delete']
+    row: Row
+
+
+class TableStorage(Protocol):
+    """Persistence backend of a single Table"""
+
+    file_path: str
+
+    def signature(self) -> Hashable:
+        """Cheap fingerprint of the persisted state, changes whenever another writer touches it"""
+
+    def load(self) -> AsyncIterator[list[Row]]:
+        """Streams the stored rows in batches without holding the raw file content"""
+
+    async def commit(self, rows: Mapping[int, Row], changes: list[Change]) -> None:
+        """Persists `changes`, `rows` is the table content with the changes already applied"""
+
+
+def _file_signature(file_path: str) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+async def _write_file_atomic(file_path: str, content: bytes) -> None:
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    async with open(tmp_path, 'wb') as file:
+        await file.write(content)
+    os.replace(tmp_path, file_path)
+    WRITTEN_BYTES.inc(len(content), os.path.basename(file_path))
+
+
+def _file_size(file_path: str) -> int:
+    signature = _file_signature(file_path)
+    return 0 if signature is None else signature[2]
+
+
+async def _encode_rows(rows: Mapping[int, Row], file_path: str, codec: JsonCodec, offload: Offload) -> bytes:
+    # The file about to be replaced is the size estimate of the new content
+    return await offload.run(_file_size(file_path), codec.dumps, list(rows.values()))
+
+
+async def _iter_json_file(file_path: str, offload: Offload) -> AsyncIterator[list[Row]]:
+    try:
+        async with open(file_path, 'r', encoding='utf-8') as file:
+            file_size = _file_size(file_path)
+            READ_BYTES.inc(file_size, os.path.basename(file_path))
+            # Large files are read in offload-sized chunks, so each one is parsed off the event loop
+            chunk_size = max(CHUNK_SIZE, offload.min_size) if offload.applies(file_size) else CHUNK_SIZE
+            async for rows in iter_json_array(file, chunk_size, offload):
+                yield rows
+    except FileNotFoundError:
+        return
+
+
+class JsonStorage:
+    """Whole table stored as one JSON array, every commit atomically replaces the file"""
+
+    def __init__(self, file_path: str, *, codec: JsonCodec = STDLIB_CODEC, offload: Offload = INLINE):
+        self.file_path = file_path
+        self.codec = codec
+        self.offload = offload
+
+    def signature(self) -> Hashable:
+        return _file_signature(self.file_path)
+
+    def load(self) -> AsyncIterator[list[Row]]:
+        return _iter_json_file(self.file_path, self.offload)
+
+    async def commit(self, rows: Mapping[int, Row], changes: list[Change]) -> None:
+        await _write_file_atomic(self.file_path, await _encode_rows(rows, self.file_path, self.codec, self.offload))
+
+
+class LogStorage:
+    """
+    Write-ahead log engine: the JSON file is a snapshot and every commit appends its changes
+    as one JSON line to `<file>.log`. Loading replays the log over the snapshot, and once the log
+    holds `compact_threshold` records it is folded into a fresh snapshot.
+    Replay is idempotent, so a crash between writing the snapshot and truncating the log is harmless,
+    and a torn last line from a crash mid-append is ignored. Loading never modifies the files, since the line may
+    still be in the middle of being appended, only the next commit, which runs under the write lock, cuts it off.
+    """
+
+    def __init__(
+            self,
+            file_path: str,
+            compact_threshold: int,
+            *,
+            codec: JsonCodec = STDLIB_CODEC,
+            offload: Offload = INLINE,
+    ):
+        self.file_path = file_path
+        self.log_path = f'{file_path}.log'
+        self.compact_threshold = compact_threshold
+        self.codec = codec
+        self.offload = offload
+        self._log_records = 0
+        self._torn_at: int | None = None  # length of the valid log prefix when the last load met a torn line
+
+    def signature(self) -> Hashable:
+        return _file_signature(self.file_path), _file_signature(self.log_path)
+
+    async def load(self) -> AsyncIterator[list[Row]]:
+        rows = {}
+        async for batch in _iter_json_file(self.file_path, self.offload):
+            rows.update((r['id'], r) for r in batch)
+
+        try:
+            async with open(self.log_path, 'rb') as file:
+                log = await file.read()
+            READ_BYTES.inc(len(log), os.path.basename(self.log_path))
+        except FileNotFoundError:
+            log = b''
+
+        self._log_records, replayed_length = 0, 0
+        for line in log.splitlines(keepends=True):
+            try:
+                changes = self.codec.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                changes = None
+            if changes is None:
+                break
+
+            for operation, row in changes:
+                if operation == 'delete':
+                    rows.pop(row['id'], None)
+                else:
+                    rows[row['id']] = row
+            self._log_records += 1
+            replayed_length += len(line)
+
+        self._torn_at = replayed_length if replayed_length < len(log) else None
+        yield list(rows.values())
+
+    async def commit(self, rows: Mapping[int, Row], changes: list[Change]) -> None:
+        if self._log_records + 1 >= self.compact_threshold:
+            await self._compact(rows)
+            return
+
+        if self._torn_at is not None:
+            os.truncate(self.log_path, self._torn_at)
+            self._torn_at = None
+
+        record = self.codec.dumps([(c.operation, c.row) for c in changes])
+        async with open(self.log_path, 'ab') as file:
+            await file.write(record + b'\n')
+        WRITTEN_BYTES.inc(len(record) + 1, os.path.basename(self.log_path))
+        self._log_records += 1
+
+    async def _compact(self, rows: Mapping[int, Row]) -> None:
+        await _write_file_atomic(self.file_path, await _encode_rows(rows, self.file_path, self.codec, self.offload))
+
+        async with open(self.log_path, 'w'):
+            pass
+        self._log_records = 0
+        self._torn_at = None
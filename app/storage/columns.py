@@ -0,0 +1,77 @@
+from array import array
+import itertools
+import sys
+from typing import Iterator, Mapping, MutableMapping
+
+from app.storage.backends import Row
+
+
+class ColumnStore(MutableMapping[int, Row]):
+    """
+    Rows with a fixed set of int/str columns, kept column-wise instead of one dict per row.
+    The row id is the slot in every column: int columns are arrays of machine integers and str columns lists of
+    interned strings. Row dicts are only built when a row is read, so the store can stand in for a dict of rows.
+    """
+
+    def __init__(self, columns: Mapping[str, type]):
+        self.columns = dict(columns)
+        self._present = bytearray()
+        self._data: dict[str, array | list] = {n: array('q') if t is int else [] for n, t in self.columns.items()}
+        self._len = 0
+
+    def __getitem__(self, row_id: int) -> Row:
+        if not self._has(row_id):
+            raise KeyError(row_id)
+
+        row = {'id': row_id}
+        for name, column in self._data.items():
+            row[name] = column[row_id]
+        return row
+
+    def __setitem__(self, row_id: int, row: Row) -> None:
+        if row_id < 0:
+            raise KeyError(row_id)
+
+        missing = row_id - len(self._present)
+        if missing >= 0:
+            # Ids mostly grow, so rows are appended to every column
+            if missing:
+                self._present.extend(bytes(missing))
+                for name, column in self._data.items():
+                    column.extend(itertools.repeat(0 if self.columns[name] is int else None, missing))
+            for name, column in self._data.items():
+                value = row[name]
+                column.append(sys.intern(value) if type(value) is str else value)
+            self._present.append(1)
+            self._len += 1
+            return
+
+        for name, column in self._data.items():
+            value = row[name]
+            column[row_id] = sys.intern(value) if type(value) is str else value
+        if not self._present[row_id]:
+            self._present[row_id] = 1
+            self._len += 1
+
+    def __delitem__(self, row_id: int) -> None:
+        if not self._has(row_id):
+            raise KeyError(row_id)
+
+        self._present[row_id] = 0
+        self._len -= 1
+        for name, column in self._data.items():
+            if self.columns[name] is not int:
+                column[row_id] = None
+
+    def __contains__(self, row_id: object) -> bool:
+        return isinstance(row_id, int) and self._has(row_id)
+
+    def __iter__(self) -> Iterator[int]:
+        """Ids in ascending order"""
+        return itertools.compress(range(len(self._present)), self._present)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _has(self, row_id: int) -> bool:
+        return 0 <= row_id < len(self._present) and self._present[row_id] == 1
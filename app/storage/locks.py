@@ -0,0 +1,19 @@
+import asyncio
+from contextlib import asynccontextmanager
+import fcntl
+import os
+from typing import AsyncIterator
+
+
+@asynccontextmanager
+async def file_lock(lock_path: str) -> AsyncIterator[None]:
+    """Exclusive advisory lock, shared by every worker process that opens the same database directory"""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,64 @@
+"""
+Copies the tables of one database engine into another, e.g. the JSON files into SQLite databases.
+
+Usage: python -m app.storage.migrate --source json --target sqlite [--replace]
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.graphql.authors.service import AuthorService
+from app.graphql.books.service import BookService
+from app.storage.backends import Change
+from app.storage.table import find_table, Table
+
+
+async def copy_table(source: Table, target: Table, *, replace: bool = False) -> int:
+    """
+    Writes every row of `source` into `target` in one commit and returns the number of copied rows.
+    A non-empty target is only overwritten with `replace`. Rows go straight to the target storage,
+    the target table picks them up on its next refresh.
+    """
+    rows = [r async for batch in source.storage.load() for r in batch]
+    async with target.transaction():
+        existing = target.all()
+        if existing and not replace:
+            raise ValueError(f'{target.storage.file_path} already has {len(existing)} rows, use --replace')
+
+        changes = [Change('delete', r) for r in existing] + [Change('insert', r) for r in rows]
+        await target.storage.commit({r['id']: r for r in rows}, changes)
+    return len(rows)
+
+
+async def migrate(source_engine: str, target_engine: str, *, replace: bool = False) -> dict[str, int]:
+    settings = get_settings()
+    source, target = (settings.copy(update={'DATABASE_ENGINE': e}) for e in (source_engine, target_engine))
+    # The services open their tables, which registers the columns and indexes of each engine
+    for service in (AuthorService, BookService):
+        service(source)
+        service(target)
+
+    return {
+        filename: await copy_table(find_table(source, filename), find_table(target, filename), replace=replace)
+        for filename in ('authors.json', 'books.json')
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', choices=['json', 'wal', 'sqlite'], default='json')
+    parser.add_argument('--target', choices=['json', 'wal', 'sqlite'], default='sqlite')
+    parser.add_argument('--replace', action='store_true', help='overwrite tables that already have rows')
+    args = parser.parse_args()
+
+    try:
+        counts = asyncio.run(migrate(args.source, args.target, replace=args.replace))
+    except ValueError as e:
+        parser.exit(1, f'{e}\n')
+
+    for filename, count in counts.items():
+        print(f'{filename}: {count} rows copied')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
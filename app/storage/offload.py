@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Literal, TypeVar
+
+from app.core.config import Settings
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True, slots=True)
+class Offload:
+    """Runs CPU-bound encode/decode work on at least `min_size` bytes in `executor`, smaller work inline"""
+
+    executor: Executor | None = None
+    min_size: int = 0
+
+    def applies(self, size: int) -> bool:
+        return self.executor is not None and size >= self.min_size
+
+    async def run(self, size: int, func: Callable[..., T], *args: Any) -> T:
+        if not self.applies(size):
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+
+INLINE = Offload()
+
+
+@lru_cache
+def _get_executor(kind: Literal['thread', 'process'], max_workers: int | None) -> Executor:
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers)
+    return ThreadPoolExecutor(max_workers, thread_name_prefix='json-offload')
+
+
+def create_offload(settings: Settings) -> Offload:
+    if settings.JSON_EXECUTOR == 'none':
+        return INLINE
+    executor = _get_executor(settings.JSON_EXECUTOR, settings.JSON_EXECUTOR_WORKERS)
+    return Offload(executor, settings.JSON_OFFLOAD_MIN_SIZE)
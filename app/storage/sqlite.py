@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import os
+import sqlite3
+from typing import Any, AsyncIterator, Callable, Hashable, Mapping
+
+from app.storage.backends import Change, Row
+
+BATCH_SIZE = 10_000
+
+_COLUMN_TYPES = {int: 'INTEGER', str: 'TEXT'}
+
+
+class SqliteStorage:
+    """
+    Table stored in its own SQLite database in WAL mode, so readers in other processes are never blocked
+    by a writer and every commit writes only the changed rows.
+    `indexes` maps index names to (SQL expression, unique) pairs created next to the table. All statements
+    run on a dedicated thread with its own connections, and `signature` relies on `PRAGMA data_version`,
+    which changes whenever another connection commits to the database.
+    """
+
+    def __init__(
+            self, file_path: str, table_name: str, columns: Mapping[str, type], indexes: Mapping[str, tuple[str, bool]]
+    ):
+        self.file_path = file_path
+        self.table_name = table_name
+        self.columns = dict(columns)
+        self.indexes = dict(indexes)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'sqlite-{table_name}')
+        self._writer: sqlite3.Connection | None = None
+        self._reader: sqlite3.Connection | None = None
+        self._version: sqlite3.Connection | None = None
+
+    def signature(self) -> Hashable:
+        if self._version is None:
+            self._version = sqlite3.connect(self.file_path, check_same_thread=False)
+        try:
+            inode = os.stat(self.file_path).st_ino
+        except FileNotFoundError:
+            inode = None
+        return inode, self._version.execute('PRAGMA data_version').fetchone()[0]
+
+    async def load(self) -> AsyncIterator[list[Row]]:
+        names = ['id', *self.columns]
+        cursor = await self._run(self._select, names)
+        try:
+            while batch := await self._run(cursor.fetchmany, BATCH_SIZE):
+                yield [dict(zip(names, r)) for r in batch]
+        finally:
+            await self._run(cursor.close)
+
+    async def commit(self, rows: Mapping[int, Row], changes: list[Change]) -> None:
+        await self._run(self._write, changes)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _select(self, names: list[str]) -> sqlite3.Cursor:
+        if self._reader is None:
+            self._connect()
+            # Loads read a snapshot on their own connection, commits running meanwhile do not affect them
+            self._reader = sqlite3.connect(self.file_path)
+        return self._reader.execute(f'SELECT {", ".join(names)} FROM {self.table_name} ORDER BY id')
+
+    def _write(self, changes: list[Change]) -> None:
+        self._connect()
+
+        names = ['id', *self.columns]
+        # Rows are upserted by id, a clash on any other unique index fails the whole commit
+        insert = (
+            f'INSERT INTO {self.table_name} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))}) '
+            f'ON CONFLICT (id) DO UPDATE SET {", ".join(f"{n} = excluded.{n}" for n in self.columns)}'
+        )
+        with self._writer:
+            # Consecutive changes of one kind are sent as a single executemany
+            for operation, group in itertools.groupby(changes, key=lambda c: c.operation):
+                rows = [c.row for c in group]
+                if operation == 'delete':
+                    self._writer.executemany(f'DELETE FROM {self.table_name} WHERE id = ?', ((r['id'],) for r in rows))
+                else:
+                    self._writer.executemany(insert, ([r[n] for n in names] for r in rows))
+
+    def _connect(self) -> None:
+        """Opens the writer connection and creates the table and its indexes on first use"""
+        if self._writer is not None:
+            return
+
+        self._writer = sqlite3.connect(self.file_path)
+        self._writer.execute('PRAGMA journal_mode = WAL')
+        # In WAL mode a commit stays atomic with NORMAL, only the last commits may be lost on power failure
+        self._writer.execute('PRAGMA synchronous = NORMAL')
+
+        definitions = ', '.join(f'{n} {_COLUMN_TYPES[t]} NOT NULL' for n, t in self.columns.items())
+        with self._writer:
+            self._writer.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table_name} (id INTEGER PRIMARY KEY, {definitions})'
+            )
+            for name, (expression, unique) in self.indexes.items():
+                self._writer.execute(
+                    f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {self.table_name}_{name} '
+                    f'ON {self.table_name} ({expression})'
+                )
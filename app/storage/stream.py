@@ -0,0 +1,93 @@
+import json
+import re
+from typing import Any, AsyncIterator, Protocol
+
+from app.storage.offload import INLINE, Offload
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# What follows an item: the next "," or the closing "]". Only the delimiter proves a scalar complete,
+# "[1, 2" + "3.5]" must not yield 2.
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+
+
+class _AsyncReader(Protocol):
+    async def read(self, size: int = -1) -> str:
+        ...
+
+
+async def iter_json_array(
+        file: _AsyncReader, chunk_size: int = CHUNK_SIZE, offload: Offload = INLINE
+) -> AsyncIterator[list[Any]]:
+    """
+    Yields the items of a top-level JSON array in batches, one per chunk read from `file`,
+    so neither the whole text nor the whole list has to be held in memory. Empty content is an empty array.
+    Buffers of at least `offload.min_size` characters are parsed in the offload executor.
+    """
+    buffer, started, empty, eof, keys = '', False, True, False, {}
+    while not eof:
+        chunk = await file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        items, position, started, empty, done = await offload.run(
+            len(buffer), _parse_chunk, buffer, started, empty, eof, keys
+        )
+        buffer = buffer[position:]
+        if items:
+            yield items
+        if done:
+            return
+
+    if started:
+        raise json.JSONDecodeError('Unterminated array', buffer, 0)
+
+
+def _parse_chunk(
+        buffer: str, started: bool, empty: bool, eof: bool, keys: dict[str, str]
+) -> tuple[list[Any], int, bool, bool, bool]:
+    """
+    Parses the complete items at the start of `buffer`.
+    Returns them with the consumed length and the new (started, empty, done) state of the array.
+    """
+    scan_once = json.JSONDecoder().scan_once
+    position, length, items = _WHITESPACE.match(buffer).end(), len(buffer), []
+
+    if not started or empty:
+        if position == length:
+            return items, position, started, empty, False
+        if not started:
+            if buffer[position] != '[':
+                raise json.JSONDecodeError('Expecting "["', buffer, position)
+            started, position = True, _WHITESPACE.match(buffer, position + 1).end()
+        if position < length and buffer[position] == ']':
+            return items, position + 1, started, empty, True
+        empty = position == length
+
+    while position < length:
+        try:
+            item, end = scan_once(buffer, position)
+        except StopIteration:
+            if eof:
+                raise json.JSONDecodeError('Expecting value', buffer, position) from None
+            break
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            break
+
+        separator = _SEPARATOR.match(buffer, end)
+        if separator is None:
+            if eof:
+                raise json.JSONDecodeError('Expecting "," delimiter', buffer, end)
+            break
+
+        if type(item) is dict:
+            # scan_once forgets its key memo after every call, share key strings across items like json.loads
+            item = {keys.setdefault(k, k): v for k, v in item.items()}
+        items.append(item)
+        if separator.group(1) == ']':
+            return items, separator.end(), started, empty, True
+        position = separator.end()
+
+    return items, position, started, empty, False
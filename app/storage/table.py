@@ -0,0 +1,491 @@
+from array import array
+import asyncio
+import bisect
+from collections import deque
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from dataclasses import dataclass
+import heapq
+import itertools
+import os
+import secrets
+import time
+from typing import Any, AsyncIterator, Callable, Hashable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+
+from app.core.codec import get_codec
+from app.core.config import Settings
+from app.core.metrics import Histogram
+from app.storage.backends import Change, JsonStorage, LogStorage, Row, TableStorage
+from app.storage.columns import ColumnStore
+from app.storage.locks import file_lock
+from app.storage.offload import create_offload
+from app.storage.sqlite import SqliteStorage
+
+
+LOAD_SECONDS = Histogram('storage_load_seconds', 'Time spent loading a whole table from storage', ('file',))
+COMMIT_SECONDS = Histogram('storage_commit_seconds', 'Time spent persisting a commit', ('file',))
+
+# Above this many tokens sharing a searched prefix, candidates are matched by their own tokens instead
+_MAX_BISECTED_POSTINGS = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Index:
+    key: Callable[[Row], Hashable]
+    unique: bool = False
+    ordered: bool = False
+    sql: str | None = None  # the key as an SQL expression, SQL engines index it in the database as well
+    tokens: bool = False  # `key` returns the row's tokens, e.g. the words of a name, the row is indexed under each
+
+
+class Table:
+    """
+    Process-level in-memory copy of a stored table.
+    Keeps rows by primary key plus secondary indexes and reloads from storage only when its signature changes.
+    Ordered indexes additionally keep their (key, id) entries sorted, so key ranges can be walked with `scan`.
+    Token indexes form an inverted index: every token maps to the ids holding it, and the sorted distinct tokens
+    allow prefix matches in `search`.
+    With `columns` the rows live in a compact ColumnStore and are only built as dicts when read.
+    `generation` grows with every reload and commit, so readers can tell whether the content changed.
+    The last `change_log_size` committed changes are kept with the generation they produced, so `changes_since`
+    can answer replicas in time proportional to the delta. A reload cannot tell what changed and starts a new log,
+    identified by `log_id`. The log belongs to this process, so with several workers sharing the files every write
+    by another worker expires it.
+    """
+
+    def __init__(
+            self,
+            storage: TableStorage,
+            indexes: dict[str, Index],
+            *,
+            columns: Mapping[str, type] | None = None,
+            use_file_lock: bool = False,
+            change_log_size: int = 0,
+    ):
+        self.storage = storage
+        self.indexes = indexes
+        self.columns = columns
+        self.use_file_lock = use_file_lock
+        self.change_log_size = change_log_size
+
+        self._rows: MutableMapping[int, Row] = self._new_rows()
+        self._ids = array('q')
+        self._max_id = 0
+        self._index_data: dict[str, dict[Hashable, Any]] = {name: {} for name in indexes}
+        self._ordered_data: dict[str, list[tuple[Any, int]]] = {n: [] for n, i in indexes.items() if i.ordered}
+        self._vocabularies: dict[str, list[str]] = {n: [] for n, i in indexes.items() if i.tokens}
+        self._signature: Hashable = None
+        self._loaded = False
+        self._preload: asyncio.Future | None = None
+        self.generation = 0
+        self.log_id = ''
+        self._change_log: deque[tuple[int, Change]] = deque()
+        self._log_floor = 0  # the log holds every change of the generations above it
+        self._lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        if self._loaded and self.storage.signature() == self._signature:
+            return
+
+        async with self._lock:
+            signature = self.storage.signature()
+            if self._loaded and signature == self._signature:
+                return
+
+            started = time.perf_counter()
+            rows = self._new_rows()
+            async for batch in self.storage.load():
+                rows.update((r['id'], r) for r in batch)
+            self._load(rows)
+            LOAD_SECONDS.observe(time.perf_counter() - started, os.path.basename(self.storage.file_path))
+            self._signature = signature
+            self._loaded = True
+            self.generation += 1
+            self.log_id = secrets.token_hex(8)
+            self._change_log.clear()
+            self._log_floor = self.generation
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Serializes read-modify-write cycles on this table and refreshes it once the lock is held.
+        With `use_file_lock` the cycle is also exclusive across worker processes.
+        """
+        async with self._write_lock:
+            lock = file_lock(f'{self.storage.file_path}.lock') if self.use_file_lock else nullcontext()
+            async with lock:
+                await self.refresh()
+                yield
+
+    def all(self) -> list[Row]:
+        return [self._rows[i] for i in self._ids]
+
+    def get(self, row_id: int) -> Row | None:
+        return self._rows.get(row_id)
+
+    def lookup(self, index_name: str, key: Hashable) -> Row | None:
+        row_id = self._index_data[index_name].get(key)
+        return None if row_id is None else self._rows[row_id]
+
+    def filter(self, index_name: str, key: Hashable) -> list[Row]:
+        return [self._rows[i] for i in self._index_data[index_name].get(key, ())]
+
+    async def find(self, index_name: str | None, key: Hashable, *, limit: int | None = None) -> list[Row]:
+        """
+        Returns up to `limit` (or all) rows whose `index_name` key, or id without an index, equals `key`, in id order.
+        A loaded table answers from its indexes. The first lookup in a cold process streams the storage instead and
+        stops after `limit` matches, so it does not wait for the whole table, which then loads in the background
+        and serves every later lookup.
+        """
+        if not self._loaded:
+            rows = await self._stream_find(index_name, key, limit)
+            if rows is not None:
+                return rows
+
+        await self.refresh()
+        if index_name is None:
+            row = self.get(key)
+            rows = [] if row is None else [row]
+        elif self.indexes[index_name].unique:
+            row = self.lookup(index_name, key)
+            rows = [] if row is None else [row]
+        else:
+            rows = self.filter(index_name, key)
+        return rows[:limit]
+
+    async def _stream_find(self, index_name: str | None, key: Hashable, limit: int | None) -> list[Row] | None:
+        # Only loads are excluded, a writer may hold the write lock while it waits for another table's lock
+        async with self._lock:
+            if self._loaded or self._preload is not None:
+                return None
+
+            key_of = (lambda r: r['id']) if index_name is None else self.indexes[index_name].key
+            rows = []
+            async with aclosing(self.storage.load()) as batches:
+                async for batch in batches:
+                    rows.extend(r for r in batch if key_of(r) == key)
+                    if limit is not None and len(rows) >= limit:
+                        break
+
+            self._preload = asyncio.ensure_future(self.refresh())
+            # A failed load is raised again by the refresh of the next lookup
+            self._preload.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return sorted(rows, key=lambda r: r['id'])[:limit]
+
+    def page(
+            self,
+            first: int | None,
+            after: int | None = None,
+            *,
+            index_name: str | None = None,
+            key: Hashable = None,
+            where: Callable[[Row], bool] | None = None,
+    ) -> tuple[list[Row], bool]:
+        """
+        Returns up to `first` (or all) rows with id greater than `after` in id order, plus whether more rows follow.
+        Rows come from the primary key or from the `key` entry of a non-unique index, optionally filtered by `where`.
+        """
+        ids = self._ids if index_name is None else self._index_data[index_name].get(key, [])
+        start = 0 if after is None else bisect.bisect_right(ids, after)
+
+        rows = []
+        for position in range(start, len(ids)):
+            row = self._rows[ids[position]]
+            if where is not None and not where(row):
+                continue
+            if len(rows) == first:
+                return rows, True
+            rows.append(row)
+        return rows, False
+
+    def scan(
+            self,
+            index_name: str,
+            start: Any,
+            match: Callable[[Any], bool],
+            first: int | None,
+            after: tuple[Any, int] | None = None,
+    ) -> tuple[list[tuple[tuple[Any, int], Row]], bool]:
+        """
+        Walks the ordered index `index_name` from the first key not below `start` (or from just past the `after`
+        position) while keys satisfy `match`. Returns up to `first` (or all) rows paired with their (key, id)
+        positions, plus whether more matching rows follow.
+        """
+        entries = self._ordered_data[index_name]
+        position = bisect.bisect_left(entries, (start,))
+        if after is not None:
+            position = max(position, bisect.bisect_right(entries, after))
+
+        rows = []
+        for entry in itertools.islice(entries, position, None):
+            if not match(entry[0]):
+                break
+            if len(rows) == first:
+                return rows, True
+            rows.append((entry, self._rows[entry[1]]))
+        return rows, False
+
+    def search(self, index_name: str, terms: list[str], first: int | None) -> list[Row]:
+        """
+        Returns up to `first` (or all) rows whose tokens in the token index `index_name` include every term, the last
+        term may also be a prefix of a token. Rows holding the last term as a whole token rank first, each group in id
+        order. Posting lists are intersected lazily from the shortest one by bisecting the others, so the cost follows
+        the rarest term instead of the table size and stops once `first` rows are found.
+        """
+        postings = self._index_data[index_name]
+        *required, last = terms
+        required_ids = [postings.get(t) for t in required]
+        if None in required_ids:
+            return []
+
+        exact = postings.get(last, ())
+        vocabulary = self._vocabularies[index_name]
+        prefixed = [
+            postings[t]
+            for t in itertools.takewhile(
+                lambda t: t.startswith(last), itertools.islice(vocabulary, bisect.bisect_left(vocabulary, last), None)
+            )
+            if t != last
+        ]
+
+        if required_ids and sum(map(len, prefixed)) > min(map(len, required_ids)):
+            # The other terms are rarer than the prefix, so their matches are checked for a prefixed token
+            if len(prefixed) <= _MAX_BISECTED_POSTINGS:
+                prefix_ids = (i for i in _intersect(required_ids) if any(_contains(ids, i) for ids in prefixed))
+            else:
+                key = self.indexes[index_name].key
+                prefix_ids = (
+                    i for i in _intersect(required_ids) if any(t.startswith(last) for t in key(self._rows[i]))
+                )
+        else:
+            # Posting lists are sorted, so merging them yields the prefix matches in id order
+            merged = (i for i, _ in itertools.groupby(heapq.merge(*prefixed)))
+            prefix_ids = (i for i in merged if all(_contains(ids, i) for ids in required_ids))
+
+        ids = itertools.chain(
+            _intersect([*required_ids, exact]), (i for i in prefix_ids if not _contains(exact, i))
+        )
+        return [self._rows[i] for i in itertools.islice(ids, first)]
+
+    def next_id(self) -> int:
+        return self._max_id + 1
+
+    async def insert(self, row: Row) -> None:
+        await self.commit([Change('insert', row)])
+
+    async def update(self, row: Row) -> None:
+        """Replaces the stored row with the same id"""
+        await self.commit([Change('update', row)])
+
+    async def delete(self, row_id: int) -> None:
+        await self.commit([Change('delete', self._rows[row_id])])
+
+    async def commit(self, changes: list[Change]) -> None:
+        """
+        Applies changes in memory and persists them, rolling the memory state back if storage fails.
+        Loads wait for the commit, so the storage is never read mid-write and a reader seeing the new storage
+        signature before it is recorded does not reload the table.
+        """
+        async with self._lock:
+            max_id = self._max_id
+            previous_rows = [self._apply(change) for change in changes]
+
+            started = time.perf_counter()
+            try:
+                await self.storage.commit(self._rows, changes)
+            except BaseException:
+                for change, previous_row in zip(reversed(changes), reversed(previous_rows)):
+                    self._revert(change, previous_row)
+                self._max_id = max_id
+                raise
+            COMMIT_SECONDS.observe(time.perf_counter() - started, os.path.basename(self.storage.file_path))
+
+            self._signature = self.storage.signature()
+            self.generation += 1
+            self._change_log.extend((self.generation, change) for change in changes)
+            while len(self._change_log) > self.change_log_size:
+                self._log_floor = self._change_log.popleft()[0]
+
+    def changes_since(self, log_id: str, generation: int) -> tuple[list[Row], list[int]] | None:
+        """
+        Rows inserted or updated and ids deleted after `generation` of the `log_id` log, each row in its latest state.
+        None when that point is not covered by the current log: it was reloaded or has dropped those changes since.
+        """
+        if log_id != self.log_id or not self._log_floor <= generation <= self.generation:
+            return None
+
+        latest: dict[int, Change] = {}
+        for change_generation, change in reversed(self._change_log):
+            if change_generation <= generation:
+                break
+            latest.setdefault(change.row['id'], change)
+        changes = sorted(latest.items())
+        return (
+            [c.row for _, c in changes if c.operation != 'delete'],
+            [row_id for row_id, c in changes if c.operation == 'delete'],
+        )
+
+    def _apply(self, change: Change) -> Row | None:
+        """Applies the change and returns the row an update replaced"""
+        row_id = change.row['id']
+        if change.operation == 'update':
+            previous_row = self._rows[row_id]
+            self._unindex_row(previous_row)
+            self._rows[row_id] = change.row
+            self._index_row(change.row)
+            return previous_row
+
+        if change.operation == 'insert':
+            self._rows[row_id] = change.row
+            _insert_sorted(self._ids, row_id)
+            self._max_id = max(self._max_id, row_id)
+            self._index_row(change.row)
+        else:
+            del self._rows[row_id]
+            _remove_sorted(self._ids, row_id)
+            self._unindex_row(change.row)
+        return None
+
+    def _revert(self, change: Change, previous_row: Row | None) -> None:
+        row_id = change.row['id']
+        if change.operation == 'update':
+            self._unindex_row(change.row)
+            self._rows[row_id] = previous_row
+            self._index_row(previous_row)
+        elif change.operation == 'insert':
+            del self._rows[row_id]
+            _remove_sorted(self._ids, row_id)
+            self._unindex_row(change.row)
+        else:
+            self._rows[row_id] = change.row
+            _insert_sorted(self._ids, row_id)
+            self._index_row(change.row)
+
+    def _new_rows(self) -> MutableMapping[int, Row]:
+        return {} if self.columns is None else ColumnStore(self.columns)
+
+    def _load(self, rows: MutableMapping[int, Row]) -> None:
+        self._rows = rows
+        self._ids = array('q', sorted(self._rows))
+        self._max_id = self._ids[-1] if self._ids else 0
+        self._index_data = {name: {} for name in self.indexes}
+        for row_id in self._ids if self.indexes else ():
+            self._index_row(self._rows[row_id], ordered=False)
+        self._ordered_data = {
+            name: sorted((self.indexes[name].key(self._rows[i]), i) for i in self._ids) for name in self._ordered_data
+        }
+        self._vocabularies = {name: sorted(self._index_data[name]) for name in self._vocabularies}
+
+    def _index_row(self, row: Row, *, ordered: bool = True) -> None:
+        for name, index in self.indexes.items():
+            key = index.key(row)
+            if index.tokens:
+                self._index_tokens(name, key, row['id'], ordered=ordered)
+                continue
+            if index.unique:
+                self._index_data[name][key] = row['id']
+            else:
+                _insert_sorted(self._index_data[name].setdefault(key, []), row['id'])
+            if ordered and index.ordered:
+                _insert_sorted(self._ordered_data[name], (key, row['id']))
+
+    def _index_tokens(self, name: str, tokens: Iterable[str], row_id: int, *, ordered: bool) -> None:
+        postings = self._index_data[name]
+        for token in set(tokens):
+            ids = postings.get(token)
+            if ids is None:
+                # Machine integer arrays keep the posting lists of a large table compact
+                ids = postings[token] = array('q')
+                if ordered:
+                    _insert_sorted(self._vocabularies[name], token)
+            _insert_sorted(ids, row_id)
+
+    def _unindex_tokens(self, name: str, tokens: Iterable[str], row_id: int) -> None:
+        postings = self._index_data[name]
+        for token in set(tokens):
+            _remove_sorted(postings[token], row_id)
+            if not postings[token]:
+                del postings[token]
+                _remove_sorted(self._vocabularies[name], token)
+
+    def _unindex_row(self, row: Row) -> None:
+        for name, index in self.indexes.items():
+            key = index.key(row)
+            if index.tokens:
+                self._unindex_tokens(name, key, row['id'])
+                continue
+            if index.unique:
+                if self._index_data[name].get(key) == row['id']:
+                    del self._index_data[name][key]
+            else:
+                _remove_sorted(self._index_data[name][key], row['id'])
+                if not self._index_data[name][key]:
+                    del self._index_data[name][key]
+            if index.ordered:
+                _remove_sorted(self._ordered_data[name], (key, row['id']))
+
+
+def _insert_sorted(items: list[Any], item: Any) -> None:
+    if not items or items[-1] < item:
+        items.append(item)
+    else:
+        bisect.insort(items, item)
+
+
+def _remove_sorted(items: list[Any], item: Any) -> None:
+    del items[bisect.bisect_left(items, item)]
+
+
+def _intersect(sorted_lists: list[Sequence[int]]) -> Iterator[int]:
+    """Lazily yields the items present in every sorted list in order, walking the shortest one"""
+    shortest = min(sorted_lists, key=len)
+    others = [items for items in sorted_lists if items is not shortest]
+    return (i for i in shortest if all(_contains(items, i) for items in others))
+
+
+def _contains(items: Sequence[Any], item: Any) -> bool:
+    position = bisect.bisect_left(items, item)
+    return position < len(items) and items[position] == item
+
+
+def _create_storage(
+        settings: Settings, file_path: str, indexes: dict[str, Index], columns: Mapping[str, type] | None
+) -> TableStorage:
+    if settings.DATABASE_ENGINE == 'sqlite':
+        if columns is None:
+            raise ValueError(f'{file_path} needs columns to be stored in SQLite')
+        base_path = os.path.splitext(file_path)[0]
+        sql_indexes = {n: (i.sql, i.unique) for n, i in indexes.items() if i.sql is not None}
+        return SqliteStorage(f'{base_path}.sqlite3', os.path.basename(base_path), columns, sql_indexes)
+
+    codec, offload = get_codec(settings.JSON_CODEC), create_offload(settings)
+    if settings.DATABASE_ENGINE == 'wal':
+        return LogStorage(file_path, compact_threshold=settings.WAL_COMPACT_THRESHOLD, codec=codec, offload=offload)
+    return JsonStorage(file_path, codec=codec, offload=offload)
+
+
+_tables: dict[tuple[str, str], Table] = {}
+
+
+def _table_key(settings: Settings, filename: str) -> tuple[str, str]:
+    return settings.DATABASE_ENGINE, os.path.realpath(os.path.join(settings.DATABASE_PATH, filename))
+
+
+def get_table(
+        settings: Settings, filename: str, indexes: dict[str, Index], columns: Mapping[str, type] | None = None
+) -> Table:
+    key = _table_key(settings, filename)
+    if key not in _tables:
+        _tables[key] = Table(
+            _create_storage(settings, key[1], indexes, columns),
+            indexes,
+            columns=columns,
+            use_file_lock=settings.DATABASE_FILE_LOCK,
+            change_log_size=settings.CHANGE_LOG_SIZE,
+        )
+    return _tables[key]
+
+
+def find_table(settings: Settings, filename: str) -> Table | None:
+    """Returns the table if a service has already opened it"""
+    return _tables.get(_table_key(settings, filename))
@@ -0,0 +1,72 @@
+"""
+Throughput of `{ books { id name author_id } }` over a large books table for each installed JSON codec,
+plus the time the codec alone spends encoding that response and the books table.
+
+Usage: python -m benchmarks.codec --rows 100000 --requests 5
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+from app.core.codec import get_codec
+from app.core.config import get_settings
+from app.graphql.response_cache import get_response_cache
+from app.main import create_app
+from benchmarks.common import seed_database
+
+QUERY = '{ books { id name author_id } }'
+
+
+def _encode_seconds(codec_name: str, value: object, repeat: int = 5) -> float:
+    dumps = get_codec(codec_name).dumps
+    started = time.perf_counter()
+    for _ in range(repeat):
+        dumps(value)
+    return (time.perf_counter() - started) / repeat
+
+
+async def run(rows: int, requests: int, codec_name: str) -> dict:
+    with tempfile.TemporaryDirectory() as database_path:
+        seed_database(database_path, authors=100, books=rows)
+        os.environ.update(DATABASE_PATH=database_path, JSON_CODEC=codec_name, RESPONSE_CACHE_MAXSIZE='0')
+        get_settings.cache_clear()
+        get_response_cache.cache_clear()
+        with open(os.path.join(database_path, 'books.json')) as file:
+            books = json.load(file)
+
+        async with httpx.AsyncClient(app=create_app(), base_url='http://test', timeout=None) as client:
+            response = await client.post('/graphql', json={'query': QUERY})
+            started = time.perf_counter()
+            for _ in range(requests):
+                (await client.post('/graphql', json={'query': QUERY})).raise_for_status()
+            elapsed = time.perf_counter() - started
+
+        return {
+            'requests_per_s': requests / elapsed,
+            'response_mb': len(response.content) / 2 ** 20,
+            'encode_response_ms': _encode_seconds(codec_name, response.json()) * 1000,
+            'encode_table_ms': _encode_seconds(codec_name, books) * 1000,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    codecs = ['stdlib'] + [n for n in ('orjson', 'msgspec') if importlib.util.find_spec(n) is not None]
+    results = {c: asyncio.run(run(args.rows, args.requests, c)) for c in codecs}
+    print(json.dumps({'rows': args.rows, **results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+import json
+import os
+import statistics
+
+import aiofiles
+
+
+@dataclass(slots=True)
+class IOCounter:
+    """Counts file opens and bytes moved through aiofiles while installed in place of `open`"""
+
+    reads: int = 0
+    writes: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def open(self, file_path: str, mode: str = 'r', **kwargs):
+        return _CountingFile(self, aiofiles.open(file_path, mode, **kwargs), mode)
+
+    def reset(self) -> None:
+        self.reads = self.writes = self.bytes_read = self.bytes_written = 0
+
+
+class _CountingFile:
+    def __init__(self, counter: IOCounter, file_cm, mode: str):
+        self._counter = counter
+        self._file_cm = file_cm
+        self._mode = mode
+
+    async def __aenter__(self):
+        self._file = await self._file_cm.__aenter__()
+        if 'r' in self._mode:
+            self._counter.reads += 1
+        else:
+            self._counter.writes += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._file_cm.__aexit__(*exc_info)
+
+    def __getattr__(self, name: str):
+        return getattr(self._file, name)
+
+    async def read(self, *args) -> str:
+        content = await self._file.read(*args)
+        self._counter.bytes_read += len(content)
+        return content
+
+    async def write(self, content: str) -> int:
+        self._counter.bytes_written += len(content)
+        return await self._file.write(content)
+
+
+def seed_database(database_path: str, authors: int, books: int) -> None:
+    with open(os.path.join(database_path, 'authors.json'), 'w') as file:
+        json.dump([{'id': i, 'name': f'Author {i}'} for i in range(1, authors + 1)], file)
+    with open(os.path.join(database_path, 'books.json'), 'w') as file:
+        json.dump(
+            [{'id': i, 'author_id': i % authors + 1, 'name': f'Book {i}'} for i in range(1, books + 1)], file
+        )
+
+
+def latency_summary(timings: list[float]) -> dict[str, float]:
+    timings = sorted(timings)
+    return {
+        'count': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        'max_ms': timings[-1] * 1000,
+    }
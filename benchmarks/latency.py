@@ -0,0 +1,75 @@
+"""
+Latency of small concurrent GraphQL queries while a large books table is read or rewritten,
+for each JSON executor setting (JSON encode/decode inline on the event loop, in threads or in processes).
+
+Usage: python -m benchmarks.latency --rows 500000 --clients 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+from app.core.config import get_settings
+from app.graphql.response_cache import get_response_cache
+from app.main import create_app
+from benchmarks.common import latency_summary, seed_database
+
+SMALL_QUERY = '{ author(author_id: 1) { ... on Author { name } } }'
+# A one-row page of the cold books table: its cost is loading the table, not resolving many objects
+LARGE_READ = '{ books_connection(first: 1) { edges { node { id } } } }'
+LARGE_COMMIT = 'mutation { create_book(input_schema: {author_id: 1, name: "Benchmark Book"}) { ... on Book { id } } }'
+
+
+async def _small_queries_during(client: httpx.AsyncClient, large_operation: str, clients: int) -> dict:
+    timings = []
+
+    async def small_queries(large: asyncio.Task) -> None:
+        while not large.done():
+            started = time.perf_counter()
+            response = await client.post('/graphql', json={'query': SMALL_QUERY})
+            timings.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    large = asyncio.create_task(client.post('/graphql', json={'query': large_operation}, timeout=None))
+    await asyncio.gather(*[small_queries(large) for _ in range(clients)])
+    response = await large
+    if response.json().get('errors'):
+        raise RuntimeError(response.json()['errors'])
+    return {'large_operation_s': time.perf_counter() - started, 'small_queries': latency_summary(timings)}
+
+
+async def run(rows: int, clients: int, executor: str) -> dict:
+    with tempfile.TemporaryDirectory() as database_path:
+        seed_database(database_path, authors=100, books=rows)
+        os.environ.update(DATABASE_PATH=database_path, JSON_EXECUTOR=executor, RESPONSE_CACHE_MAXSIZE='0')
+        get_settings.cache_clear()
+        get_response_cache.cache_clear()
+
+        async with httpx.AsyncClient(app=create_app(), base_url='http://test') as client:
+            await client.post('/graphql', json={'query': SMALL_QUERY})
+            return {
+                'large_read': await _small_queries_during(client, LARGE_READ, clients),
+                'large_commit': await _small_queries_during(client, LARGE_COMMIT, clients),
+            }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--executor', choices=('none', 'thread', 'process'), nargs='*')
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    results = {e: asyncio.run(run(args.rows, args.clients, e)) for e in args.executor or ('none', 'thread', 'process')}
+    print(json.dumps({'rows': args.rows, 'clients': args.clients, **results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Load test of the /graphql endpoint: seeds a database per scale with factory data, drives the app in-process with
+concurrent clients running a weighted mix of queries and mutations, and writes throughput and latency percentiles
+per operation to a JSON report. With --compare the report also holds the change against an earlier report.
+The response cache is disabled unless --response-cache is given, so the figures measure the resolvers.
+
+Usage: python -m benchmarks.load --scales 1000 10000 --concurrency 16 --duration 10 --output load.json
+       python -m benchmarks.load --mix author=5,create_book=1 --engine sqlite --compare load.json
+       python -m benchmarks.load --response-cache
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable
+
+import httpx
+
+from app.core.config import get_settings
+from app.graphql.response_cache import get_response_cache
+from app.main import create_app
+from app.storage.migrate import migrate
+from benchmarks.common import latency_summary
+from tests.factories import AuthorFactory, BookFactory
+
+BOOKS_PER_AUTHOR = 10
+DEFAULT_MIX = {
+    'author': 4,
+    'author_books': 3,
+    'books_page': 3,
+    'book_author': 2,
+    'search_books': 2,
+    'create_book': 1,
+    'update_book': 1,
+}
+
+
+@dataclass(slots=True)
+class Dataset:
+    authors: int
+    books: int
+    words: list[str]
+
+
+@dataclass(slots=True)
+class Session:
+    """State a client carries from one request to the next"""
+    books_cursor: str | None = None
+
+
+def _author(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = 'query($id: Int!) { author(author_id: $id) { ... on Author { name } } }'
+    return query, {'id': rng.randint(1, dataset.authors)}
+
+
+def _author_books(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = 'query($id: Int!) { author(author_id: $id) { ... on Author { name books(first: 10) { name } } } }'
+    return query, {'id': rng.randint(1, dataset.authors)}
+
+
+def _books_page(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = (
+        'query($after: String) { books_connection(first: 20, after: $after) '
+        '{ edges { node { id name } } page_info { has_next_page end_cursor } } }'
+    )
+    return query, {'after': session.books_cursor}
+
+
+def _next_books_page(session: Session, data: dict[str, Any]) -> None:
+    """Every client walks the whole table page by page and starts over after the last one"""
+    page_info = data['books_connection']['page_info']
+    session.books_cursor = page_info['end_cursor'] if page_info['has_next_page'] else None
+
+
+def _book_author(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = 'query($id: Int!) { book(book_id: $id) { ... on Book { name author { name } } } }'
+    return query, {'id': rng.randint(1, dataset.books)}
+
+
+def _search_books(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = 'query($query: String!) { search_books(query: $query, first: 20) { id name } }'
+    return query, {'query': rng.choice(dataset.words)}
+
+
+def _create_book(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = 'mutation($input: BookAddInput!) { create_book(input_schema: $input) { __typename } }'
+    return query, {'input': BookFactory(author_id=rng.randint(1, dataset.authors)).variables()}
+
+
+def _update_book(rng: random.Random, dataset: Dataset, session: Session) -> tuple[str, dict]:
+    query = (
+        'mutation($id: Int!, $input: BookUpdateInput!) { update_book(book_id: $id, input_schema: $input) '
+        '{ __typename } }'
+    )
+    book_id = rng.randint(1, dataset.books)
+    # Seeded books belong to author id % authors + 1, keeping it makes the update a rename
+    return query, {'id': book_id, 'input': BookFactory(author_id=book_id % dataset.authors + 1).variables()}
+
+
+OPERATIONS: dict[str, Callable[[random.Random, Dataset, Session], tuple[str, dict]]] = {
+    'author': _author,
+    'author_books': _author_books,
+    'books_page': _books_page,
+    'book_author': _book_author,
+    'search_books': _search_books,
+    'create_book': _create_book,
+    'update_book': _update_book,
+}
+# Operations whose next request depends on the data of the previous response
+RESPONSE_HANDLERS: dict[str, Callable[[Session, dict[str, Any]], None]] = {
+    'books_page': _next_books_page,
+}
+
+
+def _seed(database_path: str, books: int) -> Dataset:
+    authors = max(1, books // BOOKS_PER_AUTHOR)
+    author_names, book_names = set(), set()
+    with open(os.path.join(database_path, 'authors.json'), 'w') as file:
+        rows = []
+        for author_id in range(1, authors + 1):
+            name = AuthorFactory().name
+            name = name if name.lower() not in author_names else f'{name} {author_id}'
+            author_names.add(name.lower())
+            rows.append({'id': author_id, 'name': name})
+        json.dump(rows, file)
+
+    with open(os.path.join(database_path, 'books.json'), 'w') as file:
+        rows = []
+        for book_id in range(1, books + 1):
+            author_id = book_id % authors + 1
+            name = BookFactory(author_id=author_id).name
+            name = name if (author_id, name.lower()) not in book_names else f'{name[:56]} {book_id}'
+            book_names.add((author_id, name.lower()))
+            rows.append({'id': book_id, 'author_id': author_id, 'name': name})
+        json.dump(rows, file)
+
+    words = sorted({w.strip('.').lower() for _, name in book_names for w in name.split()})
+    return Dataset(authors=authors, books=books, words=words)
+
+
+async def _client(
+        client: httpx.AsyncClient,
+        dataset: Dataset,
+        mix: dict[str, int],
+        deadline: float,
+        rng: random.Random,
+        timings: dict[str, list[float]],
+        errors: dict[str, int],
+) -> None:
+    names, weights = list(mix), list(mix.values())
+    session = Session()
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        query, variables = OPERATIONS[name](rng, dataset, session)
+        started = time.perf_counter()
+        response = await client.post('/graphql', json={'query': query, 'variables': variables})
+        timings[name].append(time.perf_counter() - started)
+        if response.status_code != 200 or (body := response.json()).get('errors'):
+            errors[name] += 1
+        elif name in RESPONSE_HANDLERS:
+            RESPONSE_HANDLERS[name](session, body['data'])
+
+
+async def run_scale(
+        books: int,
+        engine: str,
+        mix: dict[str, int],
+        concurrency: int,
+        duration: float,
+        seed: int,
+        response_cache: bool = False,
+) -> dict:
+    with tempfile.TemporaryDirectory() as database_path:
+        dataset = _seed(database_path, books)
+        os.environ.update(DATABASE_PATH=database_path, DATABASE_ENGINE=engine)
+        if not response_cache:
+            os.environ['RESPONSE_CACHE_MAXSIZE'] = '0'
+        get_settings.cache_clear()
+        get_response_cache.cache_clear()
+        if engine == 'sqlite':
+            await migrate('json', 'sqlite')
+
+        async with httpx.AsyncClient(app=create_app(), base_url='http://test', timeout=None) as client:
+            # One request per operation loads the tables, so the cold start is not part of the figures
+            for name in mix:
+                query, variables = OPERATIONS[name](random.Random(seed), dataset, Session())
+                await client.post('/graphql', json={'query': query, 'variables': variables})
+
+            timings, errors = defaultdict(list), defaultdict(int)
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*[
+                _client(client, dataset, mix, deadline, random.Random(seed + i), timings, errors)
+                for i in range(concurrency)
+            ])
+            elapsed = time.perf_counter() - started
+
+    requests = sum(len(t) for t in timings.values())
+    return {
+        'authors': dataset.authors,
+        'books': dataset.books,
+        'requests': requests,
+        'errors': sum(errors.values()),
+        'throughput_rps': requests / elapsed,
+        'latency': latency_summary([t for operation in timings.values() for t in operation]),
+        'operations': {
+            name: {
+                **latency_summary(timings[name]),
+                'errors': errors[name],
+                'throughput_rps': len(timings[name]) / elapsed,
+            }
+            for name in mix if timings[name]
+        },
+    }
+
+
+def _compare(base: dict, head: dict) -> dict:
+    """Ratios head / base of throughput and latency percentiles, per scale and operation present in both reports"""
+    comparison = {}
+    for scale, result in head['scales'].items():
+        base_result = base['scales'].get(scale)
+        if base_result is None:
+            continue
+
+        def ratios(new: dict, old: dict) -> dict:
+            return {k: new[k] / old[k] for k in ('throughput_rps', 'p50_ms', 'p99_ms') if k in new and old.get(k)}
+
+        comparison[scale] = {
+            'overall': ratios({**result['latency'], **result}, {**base_result['latency'], **base_result}),
+            **{
+                name: ratios(operation, base_result['operations'][name])
+                for name, operation in result['operations'].items() if name in base_result['operations']
+            },
+        }
+    return {'base_commit': base.get('commit'), 'ratios': comparison}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'unknown operation {name!r}, choose from {", ".join(OPERATIONS)}')
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='books per scale')
+    parser.add_argument('--engine', choices=('json', 'wal', 'sqlite'), default='json')
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX, help='operation=weight,...')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per scale')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='report file, printed to stdout when omitted')
+    parser.add_argument('--compare', help='earlier report to compare against')
+    parser.add_argument('--response-cache', action='store_true', help='keep the GraphQL response cache enabled')
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'engine': args.engine,
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'mix': args.mix,
+        'response_cache': args.response_cache,
+        'scales': {
+            str(books): asyncio.run(run_scale(
+                books, args.engine, args.mix, args.concurrency, args.duration, args.seed, args.response_cache
+            ))
+            for books in args.scales
+        },
+    }
+    if args.compare:
+        with open(args.compare) as file:
+            report['comparison'] = _compare(json.load(file), report)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
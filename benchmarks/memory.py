@@ -0,0 +1,82 @@
+"""
+Peak and retained Python memory and wall time of reading a large books.json: loading the table the former way
+(read the whole file, then json.loads) against the streaming loader, dict rows against the columnar store,
+and cold BookService lookups that stream and short-circuit.
+
+Usage: python -m benchmarks.memory --rows 5000000  # about 250 MB of books.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import aiofiles
+
+from app.core.config import Settings
+from app.graphql.books.service import BookService
+from app.storage.backends import JsonStorage, Row
+from app.storage.table import Table
+from benchmarks.common import seed_database
+
+
+class _WholeFileStorage(JsonStorage):
+    async def load(self) -> AsyncIterator[list[Row]]:
+        async with aiofiles.open(self.file_path, 'r') as file:
+            yield json.loads(await file.read())
+
+
+async def _load_table(storage: JsonStorage, columns: dict[str, type] | None = None) -> Table:
+    table = Table(storage, {}, columns=columns)
+    await table.refresh()
+    return table
+
+
+async def _measure(operation: Callable[[], Awaitable[Any]]) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = await operation()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'seconds': elapsed, 'peak_mb': peak / 2 ** 20, 'retained_mb': retained / 2 ** 20}
+
+
+async def run(rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as database_path:
+        seed_database(database_path, authors=1, books=rows)
+        books_path = os.path.join(database_path, 'books.json')
+        book_service = BookService(Settings(DATABASE_PATH=database_path))
+
+        return {
+            'rows': rows,
+            'file_mb': os.path.getsize(books_path) / 2 ** 20,
+            # Cold service reads run first, while the service table is still unloaded
+            'cold_get_book_by_id_first': await _measure(lambda: book_service.get_book_by_id(1)),
+            'cold_get_book_by_id_last': await _measure(lambda: book_service.get_book_by_id(rows)),
+            'cold_get_books_by_author_id': await _measure(lambda: book_service.get_books_by_author_id(-1)),
+            'whole_file_load': await _measure(lambda: _load_table(_WholeFileStorage(books_path))),
+            'stream_load': await _measure(lambda: _load_table(JsonStorage(books_path))),
+            'columnar_stream_load': await _measure(
+                lambda: _load_table(JsonStorage(books_path), columns={'author_id': int, 'name': str})
+            ),
+            'service_table_load': await _measure(lambda: book_service.get_books_page(1)),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.rows)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
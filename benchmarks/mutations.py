@@ -0,0 +1,85 @@
+"""
+Per-mutation file I/O and latency of AuthorService/BookService against a large database.
+
+Usage: python -m benchmarks.mutations --rows 100000 --mutations 100 --engine json
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from app.core.config import Settings
+from app.graphql.authors.service import AuthorService
+from app.graphql.books.service import BookService
+from app.storage import backends
+from benchmarks.common import IOCounter, latency_summary, seed_database
+
+
+async def _measure(counter: IOCounter, mutations: int, mutation) -> dict:
+    counter.reset()
+    timings = []
+    for i in range(mutations):
+        started = time.perf_counter()
+        await mutation(i)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        **latency_summary(timings),
+        'reads_per_mutation': counter.reads / mutations,
+        'writes_per_mutation': counter.writes / mutations,
+        'bytes_read_per_mutation': counter.bytes_read / mutations,
+        'bytes_written_per_mutation': counter.bytes_written / mutations,
+    }
+
+
+async def run(rows: int, mutations: int, engine: str) -> dict:
+    counter = IOCounter()
+    backends.open = counter.open
+
+    with tempfile.TemporaryDirectory() as database_path:
+        seed_database(database_path, authors=rows, books=rows)
+        settings = Settings(DATABASE_PATH=database_path, DATABASE_ENGINE=engine)
+        author_service, book_service = AuthorService(settings), BookService(settings)
+
+        # Cold load of both tables, excluded from the per-mutation figures
+        await book_service.get_books()
+        await author_service.get_authors()
+
+        created_books = []
+
+        async def create_author(i: int) -> None:
+            await author_service.create_author(name=f'Benchmark Author {i}')
+
+        async def create_book(i: int) -> None:
+            created_books.append(await book_service.create_book(author_id=1, name=f'Benchmark Book {i}'))
+
+        async def delete_book(i: int) -> None:
+            await book_service.delete_book(created_books[i].id)
+
+        async def delete_author_cascade(i: int) -> None:
+            # Seeded authors 2.. have one book each, author 1 keeps the books created above
+            await author_service.delete_author(i + 2, cascade=True)
+
+        return {
+            'rows': rows,
+            'engine': engine,
+            'create_author': await _measure(counter, mutations, create_author),
+            'create_book': await _measure(counter, mutations, create_book),
+            'delete_book': await _measure(counter, mutations, delete_book),
+            'delete_author_cascade': await _measure(counter, mutations, delete_author_cascade),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--mutations', type=int, default=100)
+    parser.add_argument('--engine', choices=('json', 'wal'), default='json')
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.rows, args.mutations, args.engine)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
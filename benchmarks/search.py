@@ -0,0 +1,78 @@
+"""
+Latency of BookService.search_books against a large catalogue with multi-word names, plus the load time of the
+books table with its token index and the peak RSS of the process.
+
+Usage: python -m benchmarks.search --rows 1000000 --queries 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import string
+import tempfile
+import time
+
+from app.core.config import Settings
+from app.graphql.books.service import BookService
+from benchmarks.common import latency_summary
+
+
+def _seed_catalogue(database_path: str, rows: int, words: list[str], rng: random.Random) -> None:
+    # Word frequencies follow a Zipf-like curve, as in real titles
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    names = set()
+    while len(names) < rows:
+        names.add(' '.join(rng.choices(words, weights, k=rng.randint(1, 5))).title())
+
+    with open(os.path.join(database_path, 'authors.json'), 'w') as file:
+        json.dump([{'id': i, 'name': f'Author {i}'} for i in range(1, 1001)], file)
+    with open(os.path.join(database_path, 'books.json'), 'w') as file:
+        json.dump([{'id': i, 'author_id': i % 1000 + 1, 'name': n} for i, n in enumerate(names, start=1)], file)
+
+
+async def run(rows: int, queries: int, first: int) -> dict:
+    rng = random.Random(0)
+    words = sorted({''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(20_000)})
+
+    with tempfile.TemporaryDirectory() as database_path:
+        _seed_catalogue(database_path, rows, words, rng)
+        service = BookService(Settings(DATABASE_PATH=database_path, JSON_EXECUTOR='none'))
+
+        started = time.perf_counter()
+        await service.get_books_page(1)
+        load_seconds = time.perf_counter() - started
+
+        cases = {
+            'rare_word': lambda: rng.choice(words[-5000:]),
+            'common_word': lambda: rng.choice(words[:20]),
+            'prefix': lambda: rng.choice(words)[:3],
+            'two_words': lambda: f'{rng.choice(words[:200])} {rng.choice(words[:2000])}',
+            'word_and_prefix': lambda: f'{rng.choice(words[:200])} {rng.choice(words)[:2]}',
+        }
+        results = {}
+        for case, make_query in cases.items():
+            timings, found = [], 0
+            for query in [make_query() for _ in range(queries)]:
+                started = time.perf_counter()
+                found += len(await service.search_books(query, first))
+                timings.append(time.perf_counter() - started)
+            results[case] = {**latency_summary(timings), 'mean_results': found / queries}
+
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+        return {'rows': rows, 'load_seconds': load_seconds, 'peak_rss_mb': peak_rss_mb, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--first', type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.rows, args.queries, args.first)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Time to turn strawberry objects into stored rows: the compiled serializer behind strawberry_to_dict
+against the former strawberry.asdict based conversion.
+
+Usage: python -m benchmarks.serializer --rows 100000
+"""
+import argparse
+import functools
+import json
+import time
+from typing import Callable
+
+import strawberry
+
+from app.graphql.authors.types import AuthorType
+from app.graphql.books.types import BookType
+from app.graphql.converters import strawberry_to_dict
+
+
+def _asdict_to_dict(strawberry_dataclass: object, *, exclude: set[str]) -> dict:
+    return {k: v for k, v in strawberry.asdict(strawberry_dataclass).items() if k not in exclude}
+
+
+def _seconds(convert: Callable[[object], dict], objects: list[object]) -> float:
+    started = time.perf_counter()
+    for obj in objects:
+        convert(obj)
+    return time.perf_counter() - started
+
+
+def run(rows: int) -> dict:
+    tables = {
+        'authors': ([AuthorType(id=i, name=f'Author {i}') for i in range(rows)], {'books'}),
+        'books': ([BookType(id=i, author_id=i, name=f'Book {i}') for i in range(rows)], {'author'}),
+    }
+
+    results = {'rows': rows}
+    for table, (objects, exclude) in tables.items():
+        assert strawberry_to_dict(objects[0], exclude=exclude) == _asdict_to_dict(objects[0], exclude=exclude)
+        asdict_s = _seconds(functools.partial(_asdict_to_dict, exclude=exclude), objects)
+        compiled_s = _seconds(functools.partial(strawberry_to_dict, exclude=exclude), objects)
+        results[table] = {'asdict_s': asdict_s, 'compiled_s': compiled_s, 'speedup': asdict_s / compiled_s}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 import asyncio
+from contextlib import closing
 import os
 import pathlib
+import sqlite3
 
 from fastapi import FastAPI
 from httpx import AsyncClient
@@ -49,7 +51,14 @@ class TestBaseDBClass:
         """Provides empty database for all tests in class"""
         all_db_files = os.listdir(TEST_DB)
         for file_path in all_db_files:
-            open(os.path.join(TEST_DB, file_path), 'w').close()
+            file_path = os.path.join(TEST_DB, file_path)
+            if file_path.endswith('.sqlite3'):
+                with closing(sqlite3.connect(file_path)) as connection, connection:
+                    tables = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+                    for (table,) in tables:
+                        connection.execute(f'DELETE FROM {table}')
+            elif not file_path.endswith(('.sqlite3-wal', '.sqlite3-shm')):
+                open(file_path, 'w').close()
 
 
 class TestBaseClientClass:
@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='package', params=['json', 'sqlite'])
+def database_engine(request: pytest.FixtureRequest) -> str:
+    """Runs the GraphQL tests against every storage engine"""
+    from app.core.config import get_settings
+    from app.graphql.response_cache import get_response_cache
+
+    os.environ['DATABASE_ENGINE'] = request.param
+    get_settings.cache_clear()
+    get_response_cache.cache_clear()
+
+    yield request.param
+
+    del os.environ['DATABASE_ENGINE']
+    get_settings.cache_clear()
+    get_response_cache.cache_clear()
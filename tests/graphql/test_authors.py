@@ -1,3 +1,9 @@
+import asyncio
+from contextlib import closing
+import json
+import os
+import sqlite3
+
 import pytest
 
 from app.graphql.authors.service import AuthorService
@@ -42,6 +48,149 @@ class TestAuthorList(TestBaseClientDBClass):
             {'id': author2.id},
         ]
 
+    async def test_list_reloads_changed_file(self):
+        from app.core.config import get_settings
+
+        author = await create_test_author()
+        await self.client.post('/graphql', json={'query': self.QUERY})
+
+        if get_settings().DATABASE_ENGINE == 'sqlite':
+            with closing(sqlite3.connect(os.path.join(get_settings().DATABASE_PATH, 'authors.sqlite3'))) as db, db:
+                db.execute('INSERT INTO authors (id, name) VALUES (?, ?)', (author.id + 1, 'External Author'))
+        else:
+            with open(os.path.join(get_settings().DATABASE_PATH, 'authors.json'), 'w') as file:
+                json.dump(
+                    [{'id': author.id, 'name': author.name}, {'id': author.id + 1, 'name': 'External Author'}], file
+                )
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY})
+
+        response_data = response.json()['data']['authors']
+        assert response_data == [{'id': author.id}, {'id': author.id + 1}]
+
+
+class TestAuthorConnection(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery($first: Int!, $after: String) {
+            authors_connection(first: $first, after: $after) {
+                edges {
+                    cursor
+                    node {
+                        id
+                    }
+                }
+                page_info {
+                    has_next_page
+                    end_cursor
+                }
+            }
+        }
+    """
+
+    async def test_pages(self):
+        authors = [await create_test_author() for _ in range(5)]
+
+        pages, after = [], None
+        while True:
+            response = await self.client.post(
+                '/graphql', json={'query': self.QUERY, 'variables': {'first': 2, 'after': after}}
+            )
+            connection = response.json()['data']['authors_connection']
+            pages.append([e['node']['id'] for e in connection['edges']])
+            after = connection['page_info']['end_cursor']
+            if not connection['page_info']['has_next_page']:
+                break
+
+        assert pages == [[authors[0].id, authors[1].id], [authors[2].id, authors[3].id], [authors[4].id]]
+        assert after == connection['edges'][-1]['cursor']
+
+    async def test_invalid_cursor(self):
+        response = await self.client.post(
+            '/graphql', json={'query': self.QUERY, 'variables': {'first': 2, 'after': 'invalid'}}
+        )
+
+        assert response.json()['errors'][0]['message'] == 'Invalid cursor "invalid"'
+
+
+class TestAuthorListWithBooks(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery {
+            authors {
+                id
+                books {
+                    id
+                }
+            }
+        }
+    """
+
+    async def test_books_loaded_in_one_batch(self, monkeypatch: pytest.MonkeyPatch):
+        from app.graphql.books.service import BookService
+        from tests.graphql.test_books import create_test_book
+
+        author1, author2, author3 = await create_test_author(), await create_test_author(), await create_test_author()
+        book1, book2 = await create_test_book(author_id=author1.id), await create_test_book(author_id=author2.id)
+        book3 = await create_test_book(author_id=author1.id)
+
+        batch_calls = []
+        get_books_by_author_ids = BookService.get_books_by_author_ids
+
+        async def counting_get_books_by_author_ids(service: BookService, author_ids: list[int]):
+            batch_calls.append(author_ids)
+            return await get_books_by_author_ids(service, author_ids)
+
+        monkeypatch.setattr(BookService, 'get_books_by_author_ids', counting_get_books_by_author_ids)
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY})
+
+        response_data = response.json()['data']['authors']
+        assert response_data == [
+            {'id': author1.id, 'books': [{'id': book1.id}, {'id': book3.id}]},
+            {'id': author2.id, 'books': [{'id': book2.id}]},
+            {'id': author3.id, 'books': []},
+        ]
+        assert batch_calls == [[author1.id, author2.id, author3.id]]
+
+    async def test_books_page(self):
+        from tests.graphql.test_books import create_test_book
+
+        author = await create_test_author()
+        books = [await create_test_book(author_id=author.id, name=f'Book {i}') for i in range(4)]
+        await create_test_book(author_id=author.id, name='Other')
+
+        response = await self.client.post(
+            '/graphql', json={'query': '{ authors { books(first: 2, name_prefix: "book") { id } } }'}
+        )
+
+        response_data = response.json()['data']['authors']
+        assert response_data == [{'books': [{'id': books[0].id}, {'id': books[1].id}]}]
+
+    async def test_books_pages_loaded_in_one_batch(self, monkeypatch: pytest.MonkeyPatch):
+        from app.graphql.books.service import BookService
+        from tests.graphql.test_books import create_test_book
+
+        author1, author2 = await create_test_author(), await create_test_author()
+        book1 = await create_test_book(author_id=author1.id, name='Book 1')
+        await create_test_book(author_id=author1.id, name='Book 2')
+        book3 = await create_test_book(author_id=author2.id, name='Book 3')
+
+        batch_calls = []
+        get_author_books_pages = BookService.get_author_books_pages
+
+        async def counting_get_author_books_pages(service: BookService, pages: list[tuple[int, int | None, str]]):
+            batch_calls.append(pages)
+            return await get_author_books_pages(service, pages)
+
+        monkeypatch.setattr(BookService, 'get_author_books_pages', counting_get_author_books_pages)
+
+        response = await self.client.post(
+            '/graphql', json={'query': '{ authors { books(first: 1, name_prefix: "book") { id } } }'}
+        )
+
+        response_data = response.json()['data']['authors']
+        assert response_data == [{'books': [{'id': book1.id}]}, {'books': [{'id': book3.id}]}]
+        assert batch_calls == [[(author1.id, 1, 'book'), (author2.id, 1, 'book')]]
+
 
 class TestAuthorGet(TestBaseClientDBClass):
     QUERY = """
@@ -100,6 +249,26 @@ class TestAuthorGet(TestBaseClientDBClass):
         assert response_data == {'message': f'Author(id={unreal_id}) Not Found'}
 
 
+class TestAuthorSearch(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery($query: String!) {
+            search_authors(query: $query) {
+                name
+            }
+        }
+    """
+
+    async def test_search(self):
+        for name in ('George Orwell', 'Georgette Heyer', 'Boy George'):
+            await create_test_author(name=name)
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY, 'variables': {'query': 'george'}})
+
+        assert response.json()['data']['search_authors'] == [
+            {'name': 'George Orwell'}, {'name': 'Boy George'}, {'name': 'Georgette Heyer'}
+        ]
+
+
 class TestAuthorCreate(TestBaseClientDBClass):
     MUTATION = """
         mutation TestMutation($name: String!) {
@@ -157,6 +326,147 @@ class TestAuthorCreate(TestBaseClientDBClass):
         assert response.json()['data']['create_author'] == {'message': 'Validation Error'}
 
 
+class TestAuthorCreateBatch(TestBaseClientDBClass):
+    MUTATION = """
+        mutation TestMutation($input_schema: [AuthorAdd!]!) {
+            create_authors(input_schema: $input_schema) {
+                __typename
+                ... on Author {
+                    id
+                    name
+                }
+            }
+        }
+    """
+
+    async def test_create(self, monkeypatch: pytest.MonkeyPatch):
+        from app.storage.table import Table
+
+        exist_author = await create_test_author()
+        author_factory1, author_factory2 = AuthorFactory(), AuthorFactory()
+
+        commits = []
+        commit = Table.commit
+
+        async def counting_commit(table: Table, *args):
+            commits.append(table)
+            return await commit(table, *args)
+
+        monkeypatch.setattr(Table, 'commit', counting_commit)
+
+        response = await self.client.post(
+            '/graphql',
+            json={
+                'query': self.MUTATION,
+                'variables': {
+                    'input_schema': [
+                        author_factory1.variables(),
+                        {'name': exist_author.name},
+                        {'name': ''},
+                        author_factory2.variables(),
+                        author_factory1.variables(),
+                    ]
+                },
+            },
+        )
+
+        response_data = response.json()['data']['create_authors']
+        assert response_data == [
+            {'__typename': 'Author', 'id': exist_author.id + 1, 'name': author_factory1.name},
+            {'__typename': 'AuthorAlreadyExist'},
+            {'__typename': 'ValidationError'},
+            {'__typename': 'Author', 'id': exist_author.id + 2, 'name': author_factory2.name},
+            {'__typename': 'AuthorAlreadyExist'},
+        ]
+        assert len(commits) == 1
+
+    async def test_create_all_invalid(self):
+        response = await self.client.post(
+            '/graphql', json={'query': self.MUTATION, 'variables': {'input_schema': [{'name': ''}]}}
+        )
+
+        assert response.json()['data']['create_authors'] == [{'__typename': 'ValidationError'}]
+
+
+class TestAuthorCreateConcurrently(TestBaseClientDBClass):
+    MUTATION = TestAuthorCreate.MUTATION
+    QUERY = TestAuthorList.QUERY
+
+    async def test_no_lost_updates(self):
+        names = [f'Author {i}' for i in range(1000)]
+
+        responses = await asyncio.gather(*[
+            self.client.post('/graphql', json={'query': self.MUTATION, 'variables': {'name': name}}) for name in names
+        ])
+
+        created_ids = [r.json()['data']['create_author']['id'] for r in responses]
+        assert sorted(created_ids) == list(range(1, len(names) + 1))
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY})
+        assert sorted(a['id'] for a in response.json()['data']['authors']) == sorted(created_ids)
+
+
+class TestAuthorUpdate(TestBaseClientDBClass):
+    MUTATION = """
+        mutation TestMutation($author_id: Int!, $name: String!) {
+            update_author(author_id: $author_id, input_schema: {name: $name}) {
+                __typename
+                ... on Author {
+                    id
+                    name
+                }
+                ... on ValidationError {
+                    message
+                }
+                ... on AuthorNotFound {
+                    message
+                }
+                ... on AuthorAlreadyExist {
+                    message
+                }
+            }
+        }
+    """
+
+    async def _update(self, author_id: int, name: str) -> dict:
+        response = await self.client.post(
+            '/graphql', json={'query': self.MUTATION, 'variables': {'author_id': author_id, 'name': name}}
+        )
+        return response.json()['data']['update_author']
+
+    async def test_update(self):
+        from app.core.config import get_settings
+
+        author, other_author = await create_test_author(), await create_test_author()
+
+        assert await self._update(author.id, 'Renamed Author') == {
+            '__typename': 'Author', 'id': author.id, 'name': 'Renamed Author'
+        }
+        assert await self._update(author.id, 'renamed author') == {
+            '__typename': 'Author', 'id': author.id, 'name': 'renamed author'
+        }
+        assert await AuthorService(get_settings()).get_authors() == [
+            AuthorType(id=author.id, name='renamed author'), other_author
+        ]
+
+    async def test_update_not_unique(self):
+        author, other_author = await create_test_author(), await create_test_author()
+
+        assert await self._update(author.id, other_author.name.upper()) == {
+            '__typename': 'AuthorAlreadyExist', 'message': 'Author with this name already exist'
+        }
+
+    async def test_update_not_found(self):
+        assert await self._update(-9999999, 'Renamed Author') == {
+            '__typename': 'AuthorNotFound', 'message': 'Author(id=-9999999) Not Found'
+        }
+
+    async def test_update_invalid(self):
+        author = await create_test_author()
+
+        assert await self._update(author.id, '') == {'__typename': 'ValidationError', 'message': 'Validation Error'}
+
+
 class TestAuthorDelete(TestBaseClientDBClass):
     MUTATION = """
         mutation TestMutation($author_id: Int!) {
@@ -167,6 +477,16 @@ class TestAuthorDelete(TestBaseClientDBClass):
             }
         }
     """
+    CASCADE_MUTATION = """
+        mutation TestMutation($author_id: Int!, $on_delete: AuthorDeleteMode!) {
+            delete_author(author_id: $author_id, on_delete: $on_delete) {
+                __typename
+                ... on AuthorHasBooks {
+                  message
+                }
+            }
+        }
+    """
 
     async def test_delete(self):
         author = await create_test_author()
@@ -183,3 +503,81 @@ class TestAuthorDelete(TestBaseClientDBClass):
             '/graphql', json={'query': self.MUTATION, 'variables': {'author_id': not_found_id}}
         )
         assert response.json()['data']['delete_author'] == {'message': f'Author(id={not_found_id}) Not Found'}
+
+    async def test_delete_with_books_restricted(self):
+        from app.core.config import get_settings
+        from app.graphql.books.service import BookService
+        from tests.graphql.test_books import create_test_book
+
+        book = await create_test_book()
+
+        response = await self.client.post(
+            '/graphql',
+            json={'query': self.CASCADE_MUTATION, 'variables': {'author_id': book.author_id, 'on_delete': 'RESTRICT'}},
+        )
+
+        assert response.json()['data']['delete_author'] == {
+            '__typename': 'AuthorHasBooks', 'message': f'Author(id={book.author_id}) has 1 Books'
+        }
+        assert await AuthorService(get_settings()).get_author_by_id(book.author_id)
+        assert await BookService(get_settings()).get_books() == [book]
+
+    async def test_delete_cascade(self):
+        from app.core.config import get_settings
+        from app.graphql.books.service import BookService
+        from tests.graphql.test_books import create_test_book
+
+        book = await create_test_book()
+        await create_test_book(author_id=book.author_id)
+        other_book = await create_test_book()
+
+        response = await self.client.post(
+            '/graphql',
+            json={'query': self.CASCADE_MUTATION, 'variables': {'author_id': book.author_id, 'on_delete': 'CASCADE'}},
+        )
+
+        assert response.json()['data']['delete_author'] is None
+        assert [a.id for a in await AuthorService(get_settings()).get_authors()] == [other_book.author_id]
+        assert await BookService(get_settings()).get_books() == [other_book]
+
+    async def test_delete_cascade_restores_books_on_failure(self, monkeypatch: pytest.MonkeyPatch):
+        from app.core.config import get_settings
+        from app.graphql.books.service import BookService
+        from app.storage.table import Table
+        from tests.graphql.test_books import create_test_book
+
+        book = await create_test_book()
+
+        async def failing_delete(table: Table, row_id: int):
+            raise OSError('disk full')
+
+        monkeypatch.setattr(Table, 'delete', failing_delete)
+        with pytest.raises(OSError):
+            await AuthorService(get_settings()).delete_author(book.author_id, cascade=True)
+        monkeypatch.undo()
+
+        assert await AuthorService(get_settings()).get_author_by_id(book.author_id)
+        assert await BookService(get_settings()).get_books() == [book]
+
+    async def test_delete_cascade_touches_only_author_books(self, monkeypatch: pytest.MonkeyPatch):
+        from app.core.config import get_settings
+        from app.graphql.books.service import BookService
+        from app.storage.table import Table
+
+        authors = [(await create_test_author()).id for _ in range(10)]
+        book_service = BookService(get_settings())
+        await book_service.create_books([(authors[i % 10], f'Book {i}') for i in range(20_000)])
+
+        committed = []
+        commit = Table.commit
+
+        async def recording_commit(table: Table, changes):
+            committed.append(len(changes))
+            return await commit(table, changes)
+
+        monkeypatch.setattr(Table, 'commit', recording_commit)
+        await AuthorService(get_settings()).delete_author(authors[0], cascade=True)
+
+        assert committed == [2_000, 1]
+        assert len(await book_service.get_books()) == 18_000
+        assert await book_service.get_books_by_author_id(authors[0]) == []
@@ -1,6 +1,13 @@
+import asyncio
+
+import pytest
+
+from app.core.config import get_settings
+from app.graphql.authors.service import AuthorService
 from app.graphql.books.service import BookService
 from app.graphql.books.types import BookType
 from app.graphql.converters import strawberry_to_dict
+from app.graphql.pagination import encode_cursor
 from tests.conftest import TestBaseClientDBClass
 from tests.factories import BookFactory
 from tests.graphql.test_authors import create_test_author
@@ -44,6 +51,160 @@ class TestbookList(TestBaseClientDBClass):
         ]
 
 
+class TestbookListWithAuthor(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery {
+            books {
+                id
+                author {
+                    id
+                }
+            }
+        }
+    """
+
+    async def test_authors_loaded_in_one_batch(self, monkeypatch: pytest.MonkeyPatch):
+        author1, author2 = await create_test_author(), await create_test_author()
+        book1, book2 = await create_test_book(author_id=author1.id), await create_test_book(author_id=author2.id)
+        book3 = await create_test_book(author_id=author1.id)
+
+        batch_calls = []
+        get_authors_by_ids = AuthorService.get_authors_by_ids
+
+        async def counting_get_authors_by_ids(service: AuthorService, author_ids: list[int]):
+            batch_calls.append(author_ids)
+            return await get_authors_by_ids(service, author_ids)
+
+        monkeypatch.setattr(AuthorService, 'get_authors_by_ids', counting_get_authors_by_ids)
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY})
+
+        response_data = response.json()['data']['books']
+        assert response_data == [
+            {'id': book1.id, 'author': {'id': author1.id}},
+            {'id': book2.id, 'author': {'id': author2.id}},
+            {'id': book3.id, 'author': {'id': author1.id}},
+        ]
+        assert batch_calls == [[author1.id, author2.id]]
+
+
+class TestbookConnection(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery($first: Int!, $after: String, $author_id: Int, $name_prefix: String!) {
+            books_connection(first: $first, after: $after, author_id: $author_id, name_prefix: $name_prefix) {
+                edges {
+                    node {
+                        id
+                    }
+                }
+                page_info {
+                    has_next_page
+                    end_cursor
+                }
+            }
+        }
+    """
+
+    async def test_filter_pages(self):
+        author1, author2 = await create_test_author(), await create_test_author()
+        book1 = await create_test_book(author_id=author1.id, name='Animal Farm')
+        await create_test_book(author_id=author2.id, name='Animal Crackers')
+        await create_test_book(author_id=author1.id, name='Nineteen Eighty-Four')
+        book4 = await create_test_book(author_id=author1.id, name='animal spirits')
+
+        variables = {'first': 1, 'author_id': author1.id, 'name_prefix': 'ANIMAL'}
+        response = await self.client.post('/graphql', json={'query': self.QUERY, 'variables': variables})
+        first_page = response.json()['data']['books_connection']
+
+        response = await self.client.post(
+            '/graphql',
+            json={'query': self.QUERY, 'variables': {**variables, 'after': first_page['page_info']['end_cursor']}},
+        )
+        second_page = response.json()['data']['books_connection']
+
+        assert first_page['edges'] == [{'node': {'id': book1.id}}]
+        assert first_page['page_info']['has_next_page'] is True
+        assert second_page['edges'] == [{'node': {'id': book4.id}}]
+        assert second_page['page_info']['has_next_page'] is False
+
+    async def test_prefix_pages_in_name_order(self):
+        author = await create_test_author()
+        book1 = await create_test_book(author_id=author.id, name='Brave New World')
+        await create_test_book(author_id=author.id, name='Animal Farm')
+        book3 = await create_test_book(author_id=author.id, name='brave story')
+        book4 = await create_test_book(author_id=author.id, name='Beloved')
+
+        pages, after = [], None
+        while True:
+            variables = {'first': 2, 'after': after, 'name_prefix': 'b'}
+            response = await self.client.post('/graphql', json={'query': self.QUERY, 'variables': variables})
+            connection = response.json()['data']['books_connection']
+            pages.append([e['node']['id'] for e in connection['edges']])
+            after = connection['page_info']['end_cursor']
+            if not connection['page_info']['has_next_page']:
+                break
+
+        assert pages == [[book4.id, book1.id], [book3.id]]
+
+    async def test_id_cursor_with_prefix(self):
+        id_cursor = encode_cursor(1)
+
+        response = await self.client.post(
+            '/graphql', json={'query': self.QUERY, 'variables': {'first': 1, 'after': id_cursor, 'name_prefix': 'a'}}
+        )
+
+        assert response.json()['errors'][0]['message'] == f'Invalid cursor "{id_cursor}"'
+
+    async def test_page_size_limit(self):
+        response = await self.client.post(
+            '/graphql', json={'query': self.QUERY, 'variables': {'first': 101, 'name_prefix': ''}}
+        )
+
+        assert response.json()['errors'][0]['message'] == '"first" must be between 0 and 100'
+
+
+class TestbookSearch(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery($query: String!, $first: Int!) {
+            search_books(query: $query, first: $first) {
+                name
+            }
+        }
+    """
+
+    async def _search(self, query: str, first: int = 20) -> list[str]:
+        response = await self.client.post(
+            '/graphql', json={'query': self.QUERY, 'variables': {'query': query, 'first': first}}
+        )
+        return [b['name'] for b in response.json()['data']['search_books']]
+
+    async def test_search(self):
+        author = await create_test_author()
+        for name in ('Animal Farm', 'The Road to Wigan Pier', 'Farmer Giles of Ham', 'Keep the Aspidistra Flying'):
+            await create_test_book(author_id=author.id, name=name)
+
+        assert await self._search('farm') == ['Animal Farm', 'Farmer Giles of Ham']
+        assert await self._search('FARM', first=1) == ['Animal Farm']
+        assert await self._search('the fly') == ['Keep the Aspidistra Flying']
+        assert await self._search('road pier, the') == ['The Road to Wigan Pier']
+        assert await self._search('animal road') == []
+        assert await self._search('  ') == []
+
+    async def test_index_follows_changes(self):
+        from app.core.config import get_settings
+
+        book = await create_test_book(name='Burmese Days')
+        await self._search('burmese')
+
+        service = BookService(get_settings())
+        await service.update_book(book.id, author_id=book.author_id, name='Coming Up for Air')
+        assert await self._search('burmese') == []
+        assert await self._search('air') == ['Coming Up for Air']
+
+        await service.delete_book(book.id)
+        assert await self._search('air') == []
+
+
 class TestbookGet(TestBaseClientDBClass):
     QUERY = """
         query TestQuery($book_id: Int!) {
@@ -104,6 +265,9 @@ class TestbookCreate(TestBaseClientDBClass):
                 ... on BookAlreadyExist {
                     message
                 }
+                ... on AuthorNotFound {
+                    message
+                }
             }
         }
     """
@@ -136,6 +300,197 @@ class TestbookCreate(TestBaseClientDBClass):
             'message': 'Book with this name already exist for this Author'
         }
 
+    async def test_create_author_not_found(self):
+        book_factory = BookFactory(author_id=-9999999)
+
+        response = await self.client.post(
+            '/graphql', json={'query': self.MUTATION, 'variables': book_factory.variables()}
+        )
+
+        assert response.json()['data']['create_book'] == {'message': 'Author(id=-9999999) Not Found'}
+
+
+class TestbookCreateBatch(TestBaseClientDBClass):
+    MUTATION = """
+        mutation TestMutation($input_schema: [BookAddInput!]!) {
+            create_books(input_schema: $input_schema) {
+                __typename
+                ... on Book {
+                    id
+                    author_id
+                    name
+                }
+            }
+        }
+    """
+
+    async def test_create(self):
+        exist_book = await create_test_book()
+        book_factory1, book_factory2 = BookFactory(author_id=exist_book.author_id), BookFactory(author_id=-1)
+
+        response = await self.client.post(
+            '/graphql',
+            json={
+                'query': self.MUTATION,
+                'variables': {
+                    'input_schema': [
+                        book_factory1.variables(),
+                        {'author_id': exist_book.author_id, 'name': exist_book.name},
+                        book_factory2.variables(),
+                        {'author_id': exist_book.author_id, 'name': ''},
+                    ]
+                },
+            },
+        )
+
+        response_data = response.json()['data']['create_books']
+        assert response_data == [
+            {'__typename': 'Book', 'id': exist_book.id + 1, **book_factory1.variables()},
+            {'__typename': 'BookAlreadyExist'},
+            {'__typename': 'AuthorNotFound'},
+            {'__typename': 'ValidationError'},
+        ]
+
+
+class TestbookDeleteBatch(TestBaseClientDBClass):
+    MUTATION = """
+        mutation TestMutation($book_ids: [Int!]!) {
+            delete_books(book_ids: $book_ids) {
+                message
+            }
+        }
+    """
+
+    async def test_delete(self):
+        book1, book2, book3 = await create_test_book(), await create_test_book(), await create_test_book()
+        not_found_id = -9999999
+
+        response = await self.client.post(
+            '/graphql',
+            json={'query': self.MUTATION, 'variables': {'book_ids': [book1.id, not_found_id, book3.id, book1.id]}},
+        )
+
+        assert response.json()['data']['delete_books'] == [
+            None,
+            {'message': f'Book(id={not_found_id}) Not Found'},
+            None,
+            {'message': f'Book(id={book1.id}) Not Found'},
+        ]
+        assert [b.id for b in await BookService(settings=get_settings()).get_books()] == [book2.id]
+
+
+class TestbookCreateConcurrently(TestBaseClientDBClass):
+    MUTATION = TestbookCreate.MUTATION
+    DELETE_MUTATION = """
+        mutation TestMutation($book_id: Int!) {
+            delete_book(book_id: $book_id) {
+                ... on BookNotFound {
+                  message
+                }
+            }
+        }
+    """
+    QUERY = TestbookList.QUERY
+
+    async def test_no_lost_updates(self):
+        author = await create_test_author()
+        existing_books = [await create_test_book(author_id=author.id) for _ in range(200)]
+
+        created, deleted = await asyncio.gather(
+            asyncio.gather(*[
+                self.client.post(
+                    '/graphql',
+                    json={'query': self.MUTATION, 'variables': {'author_id': author.id, 'name': f'Book {i}'}},
+                )
+                for i in range(800)
+            ]),
+            asyncio.gather(*[
+                self.client.post('/graphql', json={'query': self.DELETE_MUTATION, 'variables': {'book_id': b.id}})
+                for b in existing_books
+            ]),
+        )
+
+        assert all(r.json()['data']['delete_book'] is None for r in deleted)
+        created_ids = [r.json()['data']['create_book']['id'] for r in created]
+        assert len(set(created_ids)) == len(created_ids)
+
+        response = await self.client.post('/graphql', json={'query': self.QUERY})
+        assert sorted(b['id'] for b in response.json()['data']['books']) == sorted(created_ids)
+
+
+class TestbookUpdate(TestBaseClientDBClass):
+    MUTATION = """
+        mutation TestMutation($book_id: Int!, $author_id: Int!, $name: String!) {
+            update_book(book_id: $book_id, input_schema: {author_id: $author_id, name: $name}) {
+                __typename
+                ... on Book {
+                    id
+                    author_id
+                    name
+                }
+                ... on ValidationError {
+                    message
+                }
+                ... on BookNotFound {
+                    message
+                }
+                ... on BookAlreadyExist {
+                    message
+                }
+                ... on AuthorNotFound {
+                    message
+                }
+            }
+        }
+    """
+
+    async def _update(self, book_id: int, author_id: int, name: str) -> dict:
+        response = await self.client.post(
+            '/graphql',
+            json={'query': self.MUTATION, 'variables': {'book_id': book_id, 'author_id': author_id, 'name': name}},
+        )
+        return response.json()['data']['update_book']
+
+    async def test_update(self):
+        from app.core.config import get_settings
+
+        book = await create_test_book()
+        other_author = await create_test_author()
+
+        assert await self._update(book.id, other_author.id, 'Moved Book') == {
+            '__typename': 'Book', 'id': book.id, 'author_id': other_author.id, 'name': 'Moved Book'
+        }
+        service = BookService(get_settings())
+        assert await service.get_books_by_author_id(book.author_id) == []
+        assert await service.get_books_by_author_id(other_author.id) == [
+            BookType(id=book.id, author_id=other_author.id, name='Moved Book')
+        ]
+
+    async def test_update_not_unique(self):
+        book = await create_test_book()
+        other_book = await create_test_book(author_id=book.author_id)
+
+        assert await self._update(book.id, book.author_id, other_book.name.lower()) == {
+            '__typename': 'BookAlreadyExist', 'message': 'Book with this name already exist for this Author'
+        }
+        assert await self._update(book.id, book.author_id, book.name.upper()) == {
+            '__typename': 'Book', 'id': book.id, 'author_id': book.author_id, 'name': book.name.upper()
+        }
+
+    async def test_update_not_found(self):
+        author = await create_test_author()
+
+        assert await self._update(-9999999, author.id, 'Moved Book') == {
+            '__typename': 'BookNotFound', 'message': 'Book(id=-9999999) Not Found'
+        }
+
+    async def test_update_author_not_found(self):
+        book = await create_test_book()
+
+        assert await self._update(book.id, -9999999, 'Moved Book') == {
+            '__typename': 'AuthorNotFound', 'message': 'Author(id=-9999999) Not Found'
+        }
+
 
 class TestbookDelete(TestBaseClientDBClass):
     MUTATION = """
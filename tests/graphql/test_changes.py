@@ -0,0 +1,60 @@
+from app.graphql.changes import encode_version
+from tests.conftest import TestBaseClientDBClass
+from tests.graphql.test_authors import create_test_author
+from tests.graphql.test_books import create_test_book
+
+
+class TestChanges(TestBaseClientDBClass):
+    QUERY = """
+        query TestChanges($since: String) {
+            changes(since: $since) {
+                ... on Changes {
+                    version
+                    authors {
+                        id
+                        name
+                    }
+                    deleted_author_ids
+                    books {
+                        id
+                    }
+                    deleted_book_ids
+                }
+                ... on VersionExpired {
+                    message
+                }
+            }
+        }
+    """
+
+    async def _changes(self, since: str | None) -> dict:
+        response = await self.client.post('/graphql', json={'query': self.QUERY, 'variables': {'since': since}})
+        return response.json()['data']['changes']
+
+    async def test_delta_since_version(self):
+        book = await create_test_book()
+        snapshot = await self._changes(None)
+
+        author = await create_test_author()
+        delete_book = f'mutation {{ delete_book(book_id: {book.id}) {{ message }} }}'
+        await self.client.post('/graphql', json={'query': delete_book})
+        delta = await self._changes(snapshot['version'])
+
+        assert [b['id'] for b in snapshot['books']] == [book.id]
+        assert [a['id'] for a in snapshot['authors']] == [book.author_id]
+        assert delta['authors'] == [{'id': author.id, 'name': author.name}]
+        assert delta['books'] == []
+        assert delta['deleted_book_ids'] == [book.id]
+        assert delta['deleted_author_ids'] == []
+        assert (await self._changes(delta['version']))['authors'] == []
+
+    async def test_expired_version(self):
+        await create_test_author()
+        version = encode_version(('unknown', 1), ('unknown', 1))
+
+        assert await self._changes(version) == {'message': 'Books version expired'}
+
+    async def test_invalid_version(self):
+        response = await self.client.post('/graphql', json={'query': self.QUERY, 'variables': {'since': 'abc'}})
+
+        assert response.json()['errors'][0]['message'] == 'Invalid version "abc"'
@@ -0,0 +1,32 @@
+import strawberry
+
+from app.graphql.authors.types import AuthorType
+from app.graphql.books.types import BookType
+from app.graphql.converters import strawberry_to_dict
+
+
+@strawberry.type
+class Shelf:
+    label: str
+    books: list[BookType]
+    featured: BookType | None = None
+
+
+def test_skips_resolver_fields():
+    assert strawberry_to_dict(AuthorType(id=1, name='Author')) == {'id': 1, 'name': 'Author'}
+    assert strawberry_to_dict(BookType(id=2, author_id=1, name='Book')) == {'id': 2, 'name': 'Book', 'author_id': 1}
+
+
+def test_include_exclude():
+    book = BookType(id=2, author_id=1, name='Book')
+
+    assert strawberry_to_dict(book, include={'id', 'name'}) == {'id': 2, 'name': 'Book'}
+    assert strawberry_to_dict(book, exclude={'name'}) == {'id': 2, 'author_id': 1}
+
+
+def test_nested_types():
+    shelf = Shelf(label='New', books=[BookType(id=1, author_id=1, name='Book')])
+
+    assert strawberry_to_dict(shelf) == {
+        'label': 'New', 'books': [{'id': 1, 'name': 'Book', 'author_id': 1}], 'featured': None
+    }
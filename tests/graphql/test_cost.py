@@ -0,0 +1,58 @@
+from tests.conftest import TestBaseClientDBClass
+
+
+class TestQueryCost(TestBaseClientDBClass):
+    async def test_cost_reported(self):
+        response = await self.client.post('/graphql', json={'query': '{ authors { id books { id } } }'})
+
+        # authors + 100 * (id + books) + 100 * 100 * id
+        assert response.json()['extensions']['cost'] == {'requested': 10_201, 'maximum': 50_000}
+
+    async def test_pagination_arguments(self):
+        query = """
+            query TestQuery($first: Int!) {
+                books_connection(first: $first) {
+                    edges {
+                        node {
+                            ...BookFields
+                        }
+                    }
+                    page_info {
+                        has_next_page
+                    }
+                }
+                author(author_id: 1) {
+                    ... on Author {
+                        books(first: 5) {
+                            ...BookFields
+                        }
+                    }
+                }
+            }
+
+            fragment BookFields on Book {
+                id
+                name
+            }
+        """
+
+        response = await self.client.post('/graphql', json={'query': query, 'variables': {'first': 10}})
+
+        # books_connection + edges + 10 * (node + id + name) + page_info + has_next_page
+        # + author + books + 5 * (id + name)
+        assert response.json()['extensions']['cost']['requested'] == 34 + 12
+
+    async def test_aliases_over_budget(self):
+        aliases = ' '.join(f'a{i}: authors {{ books {{ author {{ name }} }} }}' for i in range(3))
+
+        response = await self.client.post('/graphql', json={'query': f'{{ {aliases} }}'})
+
+        assert response.json() == {
+            'data': None,
+            'errors': [
+                {
+                    'message': 'Query cost 60303 exceeds maximum allowed cost 50000',
+                    'locations': [{'line': 1, 'column': 1}],
+                }
+            ],
+        }
@@ -0,0 +1,70 @@
+import re
+
+from tests.conftest import TestBaseClientDBClass
+from tests.graphql.test_books import create_test_book
+
+
+def _sample(metrics: str, name: str, **labels: str) -> float:
+    label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$', metrics, re.MULTILINE)
+    return 0 if match is None else float(match.group(1))
+
+
+class TestMetrics(TestBaseClientDBClass):
+    QUERY = """
+        query TestQuery {
+            books {
+                name
+                author {
+                    name
+                }
+            }
+        }
+    """
+
+    async def _metrics(self) -> str:
+        response = await self.client.get('/metrics')
+        assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+        return response.text
+
+    async def test_operation_and_resolver_timings(self, database_engine: str):
+        # The parse cache is shared by the runs against every engine
+        query, invalid_query = f'{self.QUERY} # {database_engine}', f'{{ unknown_field }} # {database_engine}'
+        await create_test_book()
+        before = await self._metrics()
+
+        for _ in range(2):
+            await self.client.post('/graphql', json={'query': query})
+            # A new book makes the cached response stale, so the query is executed again
+            await create_test_book()
+        await self.client.post('/graphql', json={'query': invalid_query})
+        after = await self._metrics()
+
+        def delta(name: str, **labels: str) -> float:
+            return _sample(after, name, **labels) - _sample(before, name, **labels)
+
+        assert delta('graphql_operation_seconds_count', type='query', status='ok') == 2
+        assert delta('graphql_operation_seconds_count', type='query', status='error') == 1
+        assert delta('graphql_resolver_seconds_count', field='Query.books') == 2
+        # One book in the first response, two in the second
+        assert delta('graphql_resolver_seconds_count', field='Book.author') == 3
+        assert delta('graphql_resolver_seconds_count', field='Book.name') == 0
+        assert delta('graphql_resolver_seconds_bucket', field='Query.books', le='+Inf') == 2
+        assert delta('graphql_cache_misses_total', cache='parse') == 2
+        assert delta('graphql_cache_hits_total', cache='parse') == 1
+        assert delta('graphql_cache_misses_total', cache='validation') == 2
+
+    async def test_storage_metrics(self, database_engine: str):
+        books_file = 'books.json' if database_engine == 'json' else 'books.sqlite3'
+        before = await self._metrics()
+
+        await create_test_book()
+        after = await self._metrics()
+
+        assert _sample(after, 'storage_commit_seconds_count', file=books_file) == _sample(
+            before, 'storage_commit_seconds_count', file=books_file
+        ) + 1
+        if database_engine == 'json':
+            assert _sample(after, 'storage_written_bytes_total', file=books_file) > _sample(
+                before, 'storage_written_bytes_total', file=books_file
+            )
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.graphql.persisted_queries import PersistedQueryError, PersistedQueryStore, query_hash
+from tests.conftest import TestBaseClientDBClass
+
+QUERY = '{ authors { id } }'
+
+
+def persisted_query_extensions(query: str) -> dict:
+    return {'persistedQuery': {'version': 1, 'sha256Hash': query_hash(query)}}
+
+
+class TestAutomaticPersistedQueries(TestBaseClientDBClass):
+    async def test_register_on_miss(self, database_engine: str):
+        # The app and its persisted query store are shared by the runs against every engine
+        query = f'{QUERY} # {self.__class__.__name__} {database_engine}'
+        extensions = persisted_query_extensions(query)
+
+        miss = await self.client.post('/graphql', json={'extensions': extensions})
+        register = await self.client.post('/graphql', json={'query': query, 'extensions': extensions})
+        hit = await self.client.get('/graphql', params={'extensions': json.dumps(extensions)})
+
+        assert miss.json()['errors'] == [
+            {'message': 'PersistedQueryNotFound', 'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'}}
+        ]
+        assert register.json()['data'] == {'authors': []}
+        assert hit.json()['data'] == {'authors': []}
+
+    async def test_hash_mismatch(self):
+        response = await self.client.post(
+            '/graphql', json={'query': QUERY, 'extensions': persisted_query_extensions('{ books { id } }')}
+        )
+
+        assert response.json()['errors'][0]['extensions'] == {'code': 'INVALID_SHA256_HASH'}
+
+    async def test_invalid_json_body(self):
+        response = await self.client.post(
+            '/graphql', content=b'{"query": ', headers={'content-type': 'application/json'}
+        )
+
+        assert response.status_code == 400
+
+
+class TestPersistedQueryStore:
+    def test_bounded(self):
+        store = PersistedQueryStore(maxsize=2)
+        queries = ['{ a }', '{ b }', '{ c }']
+        for q in queries:
+            store.resolve(q, persisted_query_extensions(q)['persistedQuery'])
+
+        assert store.resolve(None, persisted_query_extensions(queries[2])['persistedQuery']) == queries[2]
+        with pytest.raises(PersistedQueryError, match='PersistedQueryNotFound'):
+            store.resolve(None, persisted_query_extensions(queries[0])['persistedQuery'])
+
+    def test_allow_list(self):
+        store = PersistedQueryStore(maxsize=2, allow_list=[QUERY])
+
+        assert store.resolve(None, persisted_query_extensions(QUERY)['persistedQuery']) == QUERY
+        assert store.resolve(QUERY, None) == QUERY
+        with pytest.raises(PersistedQueryError, match='PersistedQueryNotAllowed'):
+            store.resolve('{ books { id } }', None)
+        with pytest.raises(PersistedQueryError, match='PersistedQueryNotAllowed'):
+            store.resolve('{ books { id } }', persisted_query_extensions('{ books { id } }')['persistedQuery'])
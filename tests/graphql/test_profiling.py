@@ -0,0 +1,53 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from starlette.datastructures import Headers
+import strawberry
+from strawberry.schema.config import StrawberryConfig
+
+from app.core.config import Settings
+from app.graphql.books.queries import BooksQuery
+from app.graphql.profiling import ProfilingExtension
+from tests.conftest import TEST_DB, TestBaseDBClass
+from tests.graphql.test_books import create_test_book
+
+
+class TestProfiling(TestBaseDBClass):
+    QUERY = 'query TestProfiled { books { name } }'
+
+    @pytest.fixture
+    def schema(self) -> strawberry.Schema:
+        return strawberry.Schema(
+            query=BooksQuery, extensions=(ProfilingExtension,), config=StrawberryConfig(auto_camel_case=False)
+        )
+
+    @staticmethod
+    def _context(settings: Settings, headers: dict[str, str]) -> dict:
+        return {'settings': settings, 'request': SimpleNamespace(headers=Headers(headers))}
+
+    async def test_profile_with_header(self, schema: strawberry.Schema, database_engine: str, tmp_path: str):
+        book = await create_test_book()
+        settings = Settings(
+            DATABASE_PATH=TEST_DB, DATABASE_ENGINE=database_engine, PROFILING_DIR=str(tmp_path), PROFILING_TOKEN='key'
+        )
+
+        result = await schema.execute(self.QUERY, context_value=self._context(settings, {'X-Profile': 'key'}))
+
+        assert result.data == {'books': [{'name': book.name}]}
+        profile = result.extensions['profile']
+        assert profile['phases'].keys() == {'parse_ms', 'validate_ms', 'execute_ms', 'total_ms'}
+        assert profile['phases']['total_ms'] >= profile['phases']['execute_ms']
+        assert profile['functions']
+        assert any('books/queries.py' in f['function'] and '(books)' in f['function'] for f in profile['app_functions'])
+        assert os.path.basename(profile['file']).endswith('-TestProfiled.prof')
+        assert os.path.exists(profile['file'])
+
+    @pytest.mark.parametrize('headers', [{}, {'X-Profile': 'wrong'}])
+    async def test_not_profiled(self, schema: strawberry.Schema, database_engine: str, headers: dict[str, str]):
+        settings = Settings(DATABASE_PATH=TEST_DB, DATABASE_ENGINE=database_engine, PROFILING_TOKEN='key')
+
+        result = await schema.execute(self.QUERY, context_value=self._context(settings, headers))
+
+        assert result.data == {'books': []}
+        assert not result.extensions
@@ -0,0 +1,103 @@
+import asyncio
+
+from app.graphql.response_cache import get_response_cache, ResponseCache
+from tests.conftest import TestBaseClientDBClass
+from tests.graphql.test_authors import create_test_author
+from tests.graphql.test_books import create_test_book
+
+
+class TestResponseCache(TestBaseClientDBClass):
+    AUTHORS_QUERY = """
+        query TestCachedAuthors {
+            authors {
+                id
+            }
+        }
+    """
+    BOOK_QUERY = """
+        query TestCachedBook($book_id: Int!) {
+            book(book_id: $book_id) {
+                ... on Book {
+                    name
+                    author {
+                        name
+                    }
+                }
+            }
+        }
+    """
+
+    async def test_hit(self):
+        author = await create_test_author()
+        cache = get_response_cache()
+
+        first = await self.client.post('/graphql', json={'query': self.AUTHORS_QUERY})
+        hits = cache.hits
+        second = await self.client.post('/graphql', json={'query': self.AUTHORS_QUERY})
+
+        assert first.json()['data'] == second.json()['data'] == {'authors': [{'id': author.id}]}
+        assert cache.hits == hits + 1
+
+    async def test_invalidated_per_entity_type(self):
+        author = await create_test_author()
+        book = await create_test_book(author_id=author.id)
+        book_variables = {'book_id': book.id}
+        cache = get_response_cache()
+        await self.client.post('/graphql', json={'query': self.AUTHORS_QUERY})
+        await self.client.post('/graphql', json={'query': self.BOOK_QUERY, 'variables': book_variables})
+
+        await create_test_book(author_id=author.id)
+        hits = cache.hits
+        await self.client.post('/graphql', json={'query': self.AUTHORS_QUERY})
+        assert cache.hits == hits + 1
+
+        other_author = await create_test_author()
+        authors = await self.client.post('/graphql', json={'query': self.AUTHORS_QUERY})
+        book_response = await self.client.post('/graphql', json={'query': self.BOOK_QUERY, 'variables': book_variables})
+        assert cache.hits == hits + 1
+        assert authors.json()['data'] == {'authors': [{'id': author.id}, {'id': other_author.id}]}
+        assert book_response.json()['data'] == {'book': {'name': book.name, 'author': {'name': author.name}}}
+
+    async def test_single_entity_lookups_invalidated(self):
+        book = await create_test_book()
+        book_variables = {'book_id': book.id}
+        author_query = 'query TestCachedAuthor { author(author_id: 2) { ... on AuthorNotFound { message } } }'
+        await self.client.post('/graphql', json={'query': self.BOOK_QUERY, 'variables': book_variables})
+        not_found = await self.client.post('/graphql', json={'query': author_query})
+
+        delete_mutation = f'mutation {{ delete_book(book_id: {book.id}) {{ message }} }}'
+        await self.client.post('/graphql', json={'query': delete_mutation})
+        book_response = await self.client.post('/graphql', json={'query': self.BOOK_QUERY, 'variables': book_variables})
+        author = await create_test_author()
+        author_response = await self.client.post('/graphql', json={'query': author_query})
+
+        assert not_found.json()['data'] == {'author': {'message': 'Author(id=2) Not Found'}}
+        assert author.id == 2
+        assert book_response.json()['data'] == {'book': {}}
+        assert author_response.json()['data'] == {'author': {}}
+
+    async def test_mutations_not_cached(self):
+        mutation = 'mutation { delete_book(book_id: -1) { message } }'
+        cache = get_response_cache()
+        stats = cache.stats()
+
+        await self.client.post('/graphql', json={'query': mutation})
+        await self.client.post('/graphql', json={'query': mutation})
+
+        assert cache.stats() == stats
+
+
+class _ReloadingTable:
+    generation = 1
+
+    async def refresh(self) -> None:
+        await asyncio.sleep(0)
+        self.generation = 2
+
+
+async def test_concurrent_invalidation():
+    cache = ResponseCache(maxsize=8, ttl=60)
+    cache.set('key', {'authors': []}, ((_ReloadingTable(), 1),))
+
+    assert await asyncio.gather(cache.get('key'), cache.get('key')) == [None, None]
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,99 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import strawberry
+from strawberry.schema.config import StrawberryConfig
+from strawberry.tools import merge_types
+
+from app.core.broker import Broker, get_broker, SubscriberOverflowError
+from app.graphql.authors.queries import AuthorsQuery, AuthorsSubscription
+from app.graphql.books.queries import BooksSubscription
+from tests.conftest import TestBaseClientDBClass
+from tests.graphql.test_authors import create_test_author
+from tests.graphql.test_books import create_test_book
+
+TIMEOUT = 5
+
+
+async def _subscribed(iterator: AsyncGenerator, topic: str) -> asyncio.Task:
+    """Starts waiting for the next message and returns once the subscription is registered"""
+    task = asyncio.ensure_future(anext(iterator))
+    while not get_broker().subscriber_count(topic):
+        await asyncio.sleep(0)
+    return task
+
+
+async def test_broker_fan_out():
+    broker = Broker(queue_size=10)
+    first, second = broker.subscribe('topic'), broker.subscribe('topic')
+    tasks = [asyncio.ensure_future(anext(i)) for i in (first, second)]
+    while broker.subscriber_count('topic') < 2:
+        await asyncio.sleep(0)
+
+    broker.publish('topic', 1)
+    broker.publish('other', 2)
+
+    assert await asyncio.gather(*tasks) == [1, 1]
+    await first.aclose()
+    await second.aclose()
+    assert broker.subscriber_count('topic') == 0
+
+
+async def test_broker_overflow():
+    broker = Broker(queue_size=2)
+    subscription = broker.subscribe('topic')
+    task = asyncio.ensure_future(anext(subscription))
+    while not broker.subscriber_count('topic'):
+        await asyncio.sleep(0)
+
+    for i in range(3):
+        broker.publish('topic', i)
+
+    with pytest.raises(SubscriberOverflowError):
+        await task
+    assert broker.subscriber_count('topic') == 0
+
+
+class TestSubscriptions(TestBaseClientDBClass):
+    @pytest.fixture
+    def schema(self) -> strawberry.Schema:
+        return strawberry.Schema(
+            query=AuthorsQuery,
+            subscription=merge_types('Subscription', (AuthorsSubscription, BooksSubscription)),
+            config=StrawberryConfig(auto_camel_case=False),
+        )
+
+    async def test_author_events(self, schema: strawberry.Schema):
+        created = await schema.subscribe('subscription { author_created { id name } }')
+        updated = await schema.subscribe('subscription { author_updated { id name } }')
+        deleted = await schema.subscribe('subscription { author_deleted }')
+        next_created = await _subscribed(created, 'author_created')
+        next_updated = await _subscribed(updated, 'author_updated')
+        next_deleted = await _subscribed(deleted, 'author_deleted')
+
+        author = await create_test_author()
+        update = 'mutation($id: Int!) { update_author(author_id: $id, input_schema: {name: "Renamed"}) { __typename } }'
+        delete = 'mutation($id: Int!) { delete_author(author_id: $id) { __typename } }'
+        await self.client.post('/graphql', json={'query': update, 'variables': {'id': author.id}})
+        await self.client.post('/graphql', json={'query': delete, 'variables': {'id': author.id}})
+
+        created_event, updated_event, deleted_event = await asyncio.wait_for(
+            asyncio.gather(next_created, next_updated, next_deleted), TIMEOUT
+        )
+        assert created_event.data == {'author_created': {'id': author.id, 'name': author.name}}
+        assert updated_event.data == {'author_updated': {'id': author.id, 'name': 'Renamed'}}
+        assert deleted_event.data == {'author_deleted': author.id}
+        for subscription in (created, updated, deleted):
+            await subscription.aclose()
+
+    async def test_cascade_sends_book_events(self, schema: strawberry.Schema):
+        book = await create_test_book()
+        deleted = await schema.subscribe('subscription { book_deleted }')
+        next_deleted = await _subscribed(deleted, 'book_deleted')
+
+        cascade = f'mutation {{ delete_author(author_id: {book.author_id}, on_delete: CASCADE) {{ __typename }} }}'
+        await self.client.post('/graphql', json={'query': cascade})
+
+        assert (await asyncio.wait_for(next_deleted, TIMEOUT)).data == {'book_deleted': book.id}
+        await deleted.aclose()
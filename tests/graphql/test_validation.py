@@ -0,0 +1,47 @@
+from pydantic import BaseModel, root_validator, ValidationError
+import pytest
+
+from app.graphql.authors.schemas import AuthorCreate
+from app.graphql.authors.types import AuthorAddInput
+from app.graphql.books.schemas import BookCreate
+from app.graphql.books.types import BookAddInput
+from app.graphql.validation import compile_validator, PydanticValidationExtension, ValidationErrorResponse
+
+
+class Renamed(BaseModel):
+    name: str
+
+    @root_validator
+    def strip_name(cls, values: dict) -> dict:
+        return {**values, 'name': values['name'].strip()}
+
+
+def test_validator_builds_model():
+    book = compile_validator(BookCreate)(BookAddInput(author_id='1', name='Book'))
+
+    assert book == BookCreate(author_id=1, name='Book')
+    assert book.__fields_set__ == {'author_id', 'name'}
+    assert compile_validator(BookCreate) is compile_validator(BookCreate)
+
+
+def test_validator_errors_match_model():
+    error = compile_validator(BookCreate)(BookAddInput(author_id='x', name='B'))
+
+    assert isinstance(error, ValidationError)
+    with pytest.raises(ValidationError) as e:
+        BookCreate(author_id='x', name='B')
+    assert error.errors() == e.value.errors()
+
+
+def test_validator_with_root_validators():
+    assert compile_validator(Renamed)(AuthorAddInput(name=' Author ')) == Renamed(name='Author')
+
+
+def test_validate_many():
+    extension = PydanticValidationExtension(AuthorCreate)
+
+    valid, invalid = extension.validate_many([AuthorAddInput(name='Author'), AuthorAddInput(name='adolf hitler')])
+
+    assert valid == AuthorCreate(name='Author')
+    assert isinstance(invalid, ValidationErrorResponse)
+    assert [(e.location, e.message) for e in invalid.errors] == [(['name'], "We don't do that here...")]
@@ -0,0 +1,49 @@
+import pathlib
+
+import pytest
+
+from app.storage.backends import JsonStorage
+from app.storage.columns import ColumnStore
+from app.storage.table import Index, Table
+
+COLUMNS = {'author_id': int, 'name': str}
+
+
+def test_rows_round_trip():
+    store = ColumnStore(COLUMNS)
+    store[5] = {'id': 5, 'author_id': 1, 'name': 'Fifth'}
+    store[2] = {'id': 2, 'author_id': 3, 'name': 'Second'}
+    del store[5]
+    store[7] = {'id': 7, 'author_id': 1, 'name': 'Seventh'}
+
+    assert list(store) == [2, 7]
+    assert len(store) == 2
+    assert 5 not in store and 2 in store
+    assert store[7] == {'id': 7, 'author_id': 1, 'name': 'Seventh'}
+    assert store.get(5) is None
+    with pytest.raises(KeyError):
+        del store[5]
+
+
+def test_strings_interned():
+    store = ColumnStore(COLUMNS)
+    store[1] = {'id': 1, 'author_id': 1, 'name': ''.join(['Sa', 'me'])}
+    store[2] = {'id': 2, 'author_id': 1, 'name': ''.join(['Sam', 'e'])}
+
+    assert store[1]['name'] is store[2]['name']
+
+
+async def test_columnar_table(tmp_path: pathlib.Path):
+    indexes = {'author_id': Index(key=lambda r: r['author_id'])}
+    table = Table(JsonStorage(str(tmp_path / 'rows.json')), indexes, columns=COLUMNS)
+    await table.refresh()
+    await table.insert({'id': 1, 'author_id': 1, 'name': 'First'})
+    await table.insert({'id': 2, 'author_id': 2, 'name': 'Second'})
+    await table.delete(1)
+
+    reloaded = Table(JsonStorage(str(tmp_path / 'rows.json')), indexes, columns=COLUMNS)
+    await reloaded.refresh()
+
+    assert reloaded.all() == [{'id': 2, 'author_id': 2, 'name': 'Second'}]
+    assert reloaded.filter('author_id', 2) == reloaded.all()
+    assert reloaded.next_id() == 3
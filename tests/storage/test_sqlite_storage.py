@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import closing
+import json
+import pathlib
+import sqlite3
+
+import pytest
+
+from app.core.config import Settings
+from app.storage.backends import JsonStorage
+from app.storage.migrate import copy_table
+from app.storage.sqlite import SqliteStorage
+from app.storage.table import Index, Table
+
+COLUMNS = {'name': str}
+INDEXES = {'name': Index(key=lambda r: r['name'].lower(), unique=True, sql='lower(name)')}
+
+
+def create_table(path: pathlib.Path) -> Table:
+    return Table(SqliteStorage(str(path / 'rows.sqlite3'), 'rows', COLUMNS, {'name': ('lower(name)', True)}), INDEXES)
+
+
+async def test_round_trip(tmp_path: pathlib.Path):
+    table = create_table(tmp_path)
+    await table.refresh()
+    await table.insert({'id': 1, 'name': 'first'})
+    await table.insert({'id': 2, 'name': 'second'})
+    await table.delete(1)
+
+    reopened = create_table(tmp_path)
+    await reopened.refresh()
+
+    assert reopened.all() == [{'id': 2, 'name': 'second'}]
+    assert reopened.lookup('name', 'second') == {'id': 2, 'name': 'second'}
+    assert await create_table(tmp_path).find('name', 'second', limit=1) == [{'id': 2, 'name': 'second'}]
+    with closing(sqlite3.connect(tmp_path / 'rows.sqlite3')) as connection:
+        assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+        indexes = connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        assert indexes == [('rows_name',)]
+
+
+async def test_unique_index_violation_rolls_back(tmp_path: pathlib.Path):
+    table = create_table(tmp_path)
+    await table.refresh()
+    await table.insert({'id': 1, 'name': 'first'})
+
+    with pytest.raises(sqlite3.IntegrityError):
+        await table.insert({'id': 2, 'name': 'FIRST'})
+
+    assert table.all() == [{'id': 1, 'name': 'first'}]
+
+
+async def test_external_commit_reloads(tmp_path: pathlib.Path):
+    table = create_table(tmp_path)
+    await table.refresh()
+    await table.insert({'id': 1, 'name': 'first'})
+    generation = table.generation
+
+    await table.refresh()
+    assert table.generation == generation
+
+    with closing(sqlite3.connect(tmp_path / 'rows.sqlite3')) as connection, connection:
+        connection.execute("INSERT INTO rows (id, name) VALUES (2, 'second')")
+    await table.refresh()
+
+    assert table.generation > generation
+    assert table.all() == [{'id': 1, 'name': 'first'}, {'id': 2, 'name': 'second'}]
+
+
+async def test_reads_during_commits_do_not_reload(tmp_path: pathlib.Path):
+    table = create_table(tmp_path)
+    await table.refresh()
+    await table.insert({'id': 1, 'name': '1'})
+    log_id, generation = table.log_id, table.generation
+
+    async def write() -> None:
+        for i in range(2, 52):
+            async with table.transaction():
+                await table.insert({'id': i, 'name': str(i)})
+
+    async def read(task: asyncio.Task) -> None:
+        while not task.done():
+            await table.refresh()
+            await asyncio.sleep(0)
+
+    task = asyncio.ensure_future(write())
+    await asyncio.gather(task, read(task), read(task))
+
+    # The data version changes as soon as the commit lands, readers wait for it instead of reloading
+    assert table.log_id == log_id
+    assert table.generation == generation + 50
+
+
+async def test_migrate_from_json(tmp_path: pathlib.Path):
+    rows = [{'id': 1, 'name': 'first'}, {'id': 3, 'name': 'third'}]
+    (tmp_path / 'rows.json').write_text(json.dumps(rows))
+    source, target = Table(JsonStorage(str(tmp_path / 'rows.json')), INDEXES), create_table(tmp_path)
+
+    assert await copy_table(source, target) == 2
+    await target.refresh()
+    assert target.all() == rows
+
+    with pytest.raises(ValueError):
+        await copy_table(source, target)
+    assert await copy_table(source, target, replace=True) == 2
+
+
+def test_engine_setting(tmp_path: pathlib.Path):
+    from app.storage.table import get_table
+
+    table = get_table(
+        Settings(DATABASE_PATH=str(tmp_path), DATABASE_ENGINE='sqlite'), 'rows.json', INDEXES, columns=COLUMNS
+    )
+
+    assert isinstance(table.storage, SqliteStorage)
+    assert table.storage.file_path == str(tmp_path / 'rows.sqlite3')
+    assert table.storage.indexes == {'name': ('lower(name)', True)}
@@ -0,0 +1,76 @@
+import io
+import json
+import pathlib
+
+import pytest
+
+from app.core.config import Settings
+from app.storage.backends import JsonStorage
+from app.storage.offload import create_offload
+from app.storage.stream import iter_json_array
+from app.storage.table import Index, Table
+
+
+class _ChunkedReader:
+    def __init__(self, content: str):
+        self._file = io.StringIO(content)
+
+    async def read(self, size: int = -1) -> str:
+        return self._file.read(size)
+
+
+async def read_all(content: str, chunk_size: int) -> list:
+    return [item async for batch in iter_json_array(_ChunkedReader(content), chunk_size=chunk_size) for item in batch]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1 << 16])
+async def test_items_across_chunk_boundaries(chunk_size: int):
+    items = [{'id': 1, 'name': 'a, "b" ]'}, 123, -4.5e3, 'text', True, None, [1, [2]], {}]
+
+    assert await read_all(json.dumps(items, indent=2), chunk_size) == items
+
+
+@pytest.mark.parametrize('content, chunk_size', [('[1, 23]', 5), ('[-4.5e3]', 4), ('[10.25, 1e5]', 3)])
+async def test_number_split_at_chunk_boundary(content: str, chunk_size: int):
+    assert await read_all(content, chunk_size=chunk_size) == json.loads(content)
+
+
+@pytest.mark.parametrize('content', ['', '  []  ', '[      ]'])
+async def test_empty(content: str):
+    assert await read_all(content, chunk_size=4) == []
+
+
+@pytest.mark.parametrize('content', ['[1, 2', '{"id": 1}', '[1, {"id": ]', '[1 2]', '[1,]', '[    '])
+async def test_invalid(content: str):
+    with pytest.raises(json.JSONDecodeError):
+        await read_all(content, chunk_size=4)
+
+
+async def test_only_first_cold_find_streams(tmp_path: pathlib.Path):
+    rows = [{'id': i, 'author_id': i % 3} for i in range(1, 10)]
+    (tmp_path / 'rows.json').write_text(json.dumps(rows))
+    table = Table(JsonStorage(str(tmp_path / 'rows.json')), {'author_id': Index(key=lambda r: r['author_id'])})
+
+    assert await table.find(None, 5, limit=1) == [rows[4]]
+    assert table.generation == 0
+
+    # The table has loaded once and answers from its indexes from now on
+    assert await table.find('author_id', 1) == [rows[0], rows[3], rows[6]]
+    assert await table.find(None, 100, limit=1) == []
+    assert await table.find('author_id', 1, limit=2) == [rows[0], rows[3]]
+    assert table.generation == 1
+
+
+async def test_missing_file(tmp_path: pathlib.Path):
+    assert [batch async for batch in JsonStorage(str(tmp_path / 'missing.json')).load()] == []
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+async def test_offloaded_round_trip(tmp_path: pathlib.Path, executor: str):
+    offload = create_offload(Settings(JSON_EXECUTOR=executor, JSON_OFFLOAD_MIN_SIZE=0))
+    storage = JsonStorage(str(tmp_path / 'rows.json'), offload=offload)
+    rows = {i: {'id': i, 'name': f'Row {i}'} for i in range(1, 1001)}
+
+    await storage.commit(rows, [])
+
+    assert [row async for batch in storage.load() for row in batch] == list(rows.values())
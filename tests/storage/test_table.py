@@ -0,0 +1,148 @@
+import asyncio
+import json
+import pathlib
+from typing import AsyncIterator
+
+import pytest
+
+from app.storage.backends import Change, JsonStorage, LogStorage, Row
+from app.storage.table import Index, Table
+
+
+async def test_transactions_are_exclusive_across_tables_sharing_a_file(tmp_path: pathlib.Path):
+    workers = [Table(JsonStorage(str(tmp_path / 'rows.json')), {}, use_file_lock=True) for _ in range(2)]
+
+    async def insert(table: Table) -> None:
+        async with table.transaction():
+            row_id = table.next_id()
+            await asyncio.sleep(0)
+            await table.insert({'id': row_id})
+
+    await asyncio.gather(*[insert(workers[i % 2]) for i in range(200)])
+
+    reader = Table(JsonStorage(str(tmp_path / 'rows.json')), {})
+    await reader.refresh()
+    assert [r['id'] for r in reader.all()] == list(range(1, 201))
+
+
+class _SignallingStorage(JsonStorage):
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self.loading = asyncio.Event()
+
+    async def load(self) -> AsyncIterator[list[Row]]:
+        self.loading.set()
+        async for batch in super().load():
+            yield batch
+
+
+async def test_cold_lookup_does_not_wait_for_writer(tmp_path: pathlib.Path):
+    (tmp_path / 'authors.json').write_text(json.dumps([{'id': 1}, {'id': 2}]))
+    authors = Table(_SignallingStorage(str(tmp_path / 'authors.json')), {})
+    books = Table(JsonStorage(str(tmp_path / 'books.json')), {})
+    books_locked = asyncio.Event()
+
+    async def delete_author() -> None:
+        await books_locked.wait()
+        async with authors.transaction():
+            async with books.transaction():
+                await authors.delete(2)
+
+    async def create_book() -> None:
+        async with books.transaction():
+            books_locked.set()
+            # The author is looked up while the other task holds the authors write lock and loads the table
+            await authors.storage.loading.wait()
+            assert await authors.find(None, 1, limit=1) == [{'id': 1}]
+            await books.insert({'id': 1, 'author_id': 1})
+
+    await asyncio.wait_for(asyncio.gather(delete_author(), create_book()), 5)
+
+
+async def test_update_writes_only_the_row(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    indexes = {'name': Index(key=lambda r: r['name'], unique=True)}
+    table = Table(LogStorage(str(tmp_path / 'rows.json'), compact_threshold=100), indexes)
+    await table.refresh()
+    await table.commit([Change('insert', {'id': 1, 'name': 'first'}), Change('insert', {'id': 2, 'name': 'second'})])
+
+    await table.update({'id': 1, 'name': 'renamed'})
+
+    log = (tmp_path / 'rows.json.log').read_text().splitlines()
+    assert json.loads(log[-1]) == [['update', {'id': 1, 'name': 'renamed'}]]
+    assert table.lookup('name', 'first') is None
+    assert table.lookup('name', 'renamed') == {'id': 1, 'name': 'renamed'}
+
+    async def failing_commit(*_):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(table.storage, 'commit', failing_commit)
+    with pytest.raises(OSError):
+        await table.update({'id': 2, 'name': 'lost'})
+
+    assert table.all() == [{'id': 1, 'name': 'renamed'}, {'id': 2, 'name': 'second'}]
+    assert table.lookup('name', 'lost') is None
+    assert table.lookup('name', 'second') == {'id': 2, 'name': 'second'}
+
+
+async def test_change_log_is_per_worker(tmp_path: pathlib.Path):
+    workers = [
+        Table(JsonStorage(str(tmp_path / 'rows.json')), {}, use_file_lock=True, change_log_size=10) for _ in range(2)
+    ]
+    for worker in workers:
+        await worker.refresh()
+    first, second = workers
+    await first.insert({'id': 1})
+    log_id, generation = first.log_id, first.generation
+
+    async with second.transaction():
+        await second.insert({'id': 2})
+    await first.refresh()
+
+    # A commit by another worker reloads the table, the versions handed out before cannot be answered anymore
+    assert first.changes_since(log_id, generation) is None
+    assert first.changes_since(second.log_id, second.generation) is None
+    assert first.all() == [{'id': 1}, {'id': 2}]
+
+
+async def test_search_ranks_whole_tokens_first(tmp_path: pathlib.Path):
+    table = Table(JsonStorage(str(tmp_path / 'rows.json')), {'tokens': Index(key=lambda r: r['tokens'], tokens=True)})
+    await table.refresh()
+    await table.commit([
+        Change('insert', {'id': 1, 'tokens': ['blue', 'moon']}),
+        Change('insert', {'id': 2, 'tokens': ['moonlight']}),
+        Change('insert', {'id': 3, 'tokens': ['moon', 'river']}),
+        Change('insert', {'id': 4, 'tokens': ['blue', 'moonrise']}),
+    ])
+
+    assert [r['id'] for r in table.search('tokens', ['moon'], None)] == [1, 3, 2, 4]
+    assert [r['id'] for r in table.search('tokens', ['moon'], 3)] == [1, 3, 2]
+    assert [r['id'] for r in table.search('tokens', ['blue', 'moo'], None)] == [1, 4]
+    assert [r['id'] for r in table.search('tokens', ['red', 'moon'], None)] == []
+
+    await table.delete(3)
+    reloaded = Table(JsonStorage(str(tmp_path / 'rows.json')), table.indexes)
+    await reloaded.refresh()
+    for t in (table, reloaded):
+        assert [r['id'] for r in t.search('tokens', ['moon'], None)] == [1, 2, 4]
+        assert [r['id'] for r in t.search('tokens', ['riv'], None)] == []
+
+
+async def test_changes_since(tmp_path: pathlib.Path):
+    table = Table(JsonStorage(str(tmp_path / 'rows.json')), {}, change_log_size=3)
+    await table.refresh()
+    log_id, start = table.log_id, table.generation
+    await table.commit([Change('insert', {'id': 1, 'name': 'first'}), Change('insert', {'id': 2, 'name': 'second'})])
+    middle = table.generation
+    await table.update({'id': 1, 'name': 'renamed'})
+    await table.delete(2)
+
+    assert table.changes_since(log_id, middle) == ([{'id': 1, 'name': 'renamed'}], [2])
+    assert table.changes_since(log_id, table.generation) == ([], [])
+    # The first commit's changes fell out of the log
+    assert table.changes_since(log_id, start) is None
+    assert table.changes_since('other', middle) is None
+
+    (tmp_path / 'rows.json').write_text('[]')
+    await table.refresh()
+    assert table.log_id != log_id
+    assert table.changes_since(log_id, table.generation) is None